@@ -70,6 +70,9 @@ class Settings(BaseSettings):
     
     # Rate Limiting
     RATE_LIMIT: int = 100  # requests per minute
+    GLOBAL_RATE_LIMIT: Optional[int] = None  # requests per minute across all clients
+    GLOBAL_RATE_LIMIT_SHARDS: int = 1  # Redis keys the global limit is split across
+    RATE_LIMIT_EXEMPT_IPS: List[str] = []  # internal peer addresses that bypass rate limiting
     
     # Multi-tenant
     TENANT_HEADER: str = "X-Tenant-ID"
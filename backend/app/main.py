@@ -50,7 +50,13 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Custom Middlewares
 app.add_middleware(SecurityMiddleware)
-app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT)
+app.add_middleware(
+    RateLimitMiddleware,
+    requests_per_minute=settings.RATE_LIMIT,
+    global_requests_per_minute=settings.GLOBAL_RATE_LIMIT,
+    global_shards=settings.GLOBAL_RATE_LIMIT_SHARDS,
+    exempt_ips=settings.RATE_LIMIT_EXEMPT_IPS,
+)
 app.add_middleware(TenantMiddleware)
 
 # Request timing middleware
@@ -60,7 +66,7 @@ async def add_process_time_header(request: Request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
-    logger.info(f"Request processed in {process_time:.4f}s", extra={
+    logger.info("Request processed in %.4fs", process_time, extra={
         "method": request.method,
         "url": str(request.url),
         "process_time": process_time
@@ -94,7 +100,7 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global exception handler caught: {exc}", exc_info=True)
+    logger.error("Global exception handler caught: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
@@ -3,65 +3,193 @@ Rate limiting middleware
 Redis-backed distributed rate limiting
 """
 
-from fastapi import HTTPException, status
+from fastapi import status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-import redis
+from starlette.responses import Response
+from typing import Iterable, Optional, Tuple
+from cachetools import TTLCache
+import redis.asyncio as redis
 import time
 import hashlib
+import math
+import socket
+import zlib
 
 from ..core.config import settings
 
+# Health and metrics endpoints are never rate limited
+EXEMPT_PATHS = frozenset({"/health", "/ready", "/metrics"})
+
+# Serialized once; every rejected request gets the same body
+RATE_LIMITED_BODY = b'{"detail":"Rate limit exceeded. Please try again later."}'
+
+# Probe idle Redis connections after 60s instead of the 2h kernel default,
+# so dead pooled connections are noticed before a request picks them up
+KEEPALIVE_OPTIONS = {socket.TCP_KEEPIDLE: 60} if hasattr(socket, "TCP_KEEPIDLE") else {}
+
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
     Distributed rate limiting using Redis
-    Implements sliding window algorithm
+    Implements token bucket algorithm, one hash per client
     """
     
-    def __init__(self, app, requests_per_minute: int = 100):
+    # Refill and consume every bucket in a single atomic round trip; the
+    # request is only charged if all buckets have a token. All math is
+    # integer: tokens are stored as milli-tokens and times as epoch ms.
+    # KEYS = bucket hashes with 'tokens' and 'last_refill' fields
+    # ARGV = [now_ms, window_ms, limit for each key...]
+    # Returns {allowed, remaining in the first bucket, retry_after_ms}
+    TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tokens = {}
+local refilled_at = {}
+local allowed = 1
+local retry_after_ms = 0
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i + 2]) * 1000
+    local state = redis.call('HMGET', key, 'tokens', 'last_refill')
+    local t = tonumber(state[1]) or capacity
+    local last_refill = tonumber(state[2]) or now
+    local refill = math.floor((now - last_refill) * capacity / window)
+    if refill > 0 then
+        t = t + refill
+        if t >= capacity then
+            t = capacity
+            last_refill = now
+        else
+            -- Advance only by the time those whole milli-tokens took, so the
+            -- remainder carries over to the next request
+            last_refill = last_refill + math.ceil(refill * window / capacity)
+        end
+    end
+    if t < 1000 then
+        allowed = 0
+        local wait = math.ceil((1000 - t) * window / capacity) - (now - last_refill)
+        retry_after_ms = math.max(retry_after_ms, wait, 1)
+    end
+    tokens[i] = t
+    refilled_at[i] = last_refill
+end
+
+for i, key in ipairs(KEYS) do
+    if allowed == 1 then
+        tokens[i] = tokens[i] - 1000
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'last_refill', refilled_at[i])
+    redis.call('PEXPIRE', key, window)
+end
+
+return {allowed, math.floor(tokens[1] / 1000), retry_after_ms}
+"""
+    
+    # Clients rejected by Redis are rejected locally until their next token
+    # is due; entries live at most this long so Redis stays the source of truth
+    LOCAL_BLOCK_TTL = 1.0  # seconds
+    
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 100,
+        global_requests_per_minute: Optional[int] = None,
+        global_shards: int = 1,
+        exempt_ips: Iterable[str] = (),
+        max_connections: int = 50,
+    ):
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
+        self._limit_header = str(requests_per_minute)
+        # Retry-After is added per response from the bucket's refill time
+        self._rejected_headers = {
+            "X-RateLimit-Limit": self._limit_header,
+            "X-RateLimit-Remaining": "0",
+        }
+        # Trusted internal clients that bypass rate limiting entirely. They
+        # are matched on the socket peer address, never on X-Forwarded-For,
+        # which any caller can set.
+        self.exempt_ips = frozenset(exempt_ips)
         self.window_size = 60  # seconds
+        self._window_ms = self.window_size * 1000
+        
+        # Optional API-wide limit checked alongside each client's bucket.
+        # It is split across shard keys (each holding its share of the
+        # limit) so a single hot key does not serialize all requests;
+        # clients are hashed onto a shard.
+        self.global_requests_per_minute = global_requests_per_minute
+        self.global_shards = max(1, global_shards)
+        if global_requests_per_minute:
+            self._global_keys = [
+                f"ratelimit:bucket:global:{shard}" for shard in range(self.global_shards)
+            ]
+            extra_limits = [max(1, global_requests_per_minute // self.global_shards)]
+        else:
+            self._global_keys = []
+            extra_limits = []
+        
+        # Script arguments that do not change between requests
+        self._script_args = [self._window_ms, requests_per_minute, *extra_limits]
+        self._blocked_until = TTLCache(maxsize=10_000, ttl=self.LOCAL_BLOCK_TTL)
         
         try:
-            self.redis_client = redis.from_url(
+            # Shared pool; connections are opened lazily on first use, so
+            # nothing is bound to an event loop at construction time.
+            # The script only returns integer replies, so responses are
+            # left undecoded.
+            self.redis_pool = redis.ConnectionPool.from_url(
                 settings.REDIS_URL,
-                decode_responses=True
+                max_connections=max_connections,
+                health_check_interval=30,
+                socket_keepalive=True,
+                socket_keepalive_options=KEEPALIVE_OPTIONS,
+                retry_on_timeout=True,
+            )
+            self.redis_client = redis.Redis(connection_pool=self.redis_pool)
+            # Script object uses EVALSHA and reloads the script on NOSCRIPT
+            self._token_bucket = self.redis_client.register_script(
+                self.TOKEN_BUCKET_SCRIPT
             )
             self.redis_available = True
-        except:
+        except (redis.RedisError, ValueError):
+            # Malformed REDIS_URL or unsupported connection options
             self.redis_available = False
     
     async def dispatch(self, request: Request, call_next):
         # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/ready", "/metrics"]:
+        if request.url.path in EXEMPT_PATHS:
             return await call_next(request)
         
         if not self.redis_available:
             # Fall back to no rate limiting if Redis is unavailable
             return await call_next(request)
         
+        if request.client is not None and request.client.host in self.exempt_ips:
+            return await call_next(request)
+        
         # Get client identifier (IP or API key)
         client_id = self._get_client_id(request)
         
         # Check rate limit
-        if not self._check_rate_limit(client_id):
-            raise HTTPException(
+        allowed, remaining, retry_after_ms = await self._check_rate_limit(client_id)
+        if not allowed:
+            # HTTPException raised from middleware bypasses FastAPI's
+            # exception handlers, so the 429 response is returned directly
+            return Response(
+                content=RATE_LIMITED_BODY,
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please try again later.",
                 headers={
-                    "Retry-After": "60",
-                    "X-RateLimit-Limit": str(self.requests_per_minute),
-                    "X-RateLimit-Remaining": "0",
-                }
+                    **self._rejected_headers,
+                    "Retry-After": str(max(1, math.ceil(retry_after_ms / 1000))),
+                },
+                media_type="application/json",
             )
         
         response = await call_next(request)
         
         # Add rate limit headers
-        remaining = self._get_remaining_requests(client_id)
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
+        response.headers["X-RateLimit-Limit"] = self._limit_header
         response.headers["X-RateLimit-Remaining"] = str(remaining)
         
         return response
@@ -82,50 +210,32 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         
         return f"ip:{client_ip}"
     
-    def _check_rate_limit(self, client_id: str) -> bool:
-        """Check if client is within rate limit"""
-        key = f"ratelimit:{client_id}"
-        current_time = time.time()
+    async def _check_rate_limit(self, client_id: str) -> Tuple[bool, int, int]:
+        """
+        Check and record a request for the client
+        Returns (allowed, remaining requests in the bucket,
+        milliseconds until the next token when rejected)
+        """
+        keys = [f"ratelimit:bucket:{client_id}"]
+        if self._global_keys:
+            shard = zlib.crc32(client_id.encode()) % self.global_shards
+            keys.append(self._global_keys[shard])
+        now_ms = time.time_ns() // 1_000_000
         
-        try:
-            # Remove old entries outside the window
-            self.redis_client.zremrangebyscore(
-                key,
-                0,
-                current_time - self.window_size
-            )
-            
-            # Count requests in current window
-            request_count = self.redis_client.zcard(key)
-            
-            if request_count >= self.requests_per_minute:
-                return False
-            
-            # Add current request
-            self.redis_client.zadd(key, {str(current_time): current_time})
-            
-            # Set expiry on the key
-            self.redis_client.expire(key, self.window_size)
-            
-            return True
-        except:
-            # If Redis fails, allow the request
-            return True
-    
-    def _get_remaining_requests(self, client_id: str) -> int:
-        """Get remaining requests for client"""
-        key = f"ratelimit:{client_id}"
-        current_time = time.time()
+        # Reject without a Redis round trip while the bucket is known empty
+        blocked_until_ms = self._blocked_until.get(client_id)
+        if blocked_until_ms is not None and now_ms < blocked_until_ms:
+            return False, 0, blocked_until_ms - now_ms
         
         try:
-            # Remove old entries
-            self.redis_client.zremrangebyscore(
-                key,
-                0,
-                current_time - self.window_size
+            # Lua numbers come back as integer replies, so no parsing is needed
+            allowed, remaining, retry_after_ms = await self._token_bucket(
+                keys=keys,
+                args=[now_ms, *self._script_args]
             )
-            
-            request_count = self.redis_client.zcard(key)
-            return max(0, self.requests_per_minute - request_count)
-        except:
-            return self.requests_per_minute
+            if not allowed:
+                self._blocked_until[client_id] = now_ms + retry_after_ms
+            return allowed == 1, remaining, retry_after_ms
+        except (redis.RedisError, OSError):
+            # If Redis fails, allow the request; cancellation propagates
+            return True, self.requests_per_minute, 0
@@ -12,6 +12,17 @@ from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Public endpoint prefixes, matched in a single str.startswith call
+PUBLIC_PATH_PREFIXES = (
+    "/health",
+    "/ready",
+    "/metrics",
+    "/api/v1/docs",
+    "/api/v1/openapi.json",
+    "/api/v1/auth/login",
+    "/api/v1/auth/register",
+)
+
 
 class TenantMiddleware(BaseHTTPMiddleware):
     """
@@ -24,17 +35,7 @@ class TenantMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next):
         # Skip tenant validation for public endpoints
-        public_paths = [
-            "/health",
-            "/ready",
-            "/metrics",
-            "/api/v1/docs",
-            "/api/v1/openapi.json",
-            "/api/v1/auth/login",
-            "/api/v1/auth/register",
-        ]
-        
-        if any(request.url.path.startswith(path) for path in public_paths):
+        if request.url.path.startswith(PUBLIC_PATH_PREFIXES):
             return await call_next(request)
         
         # Extract tenant ID from header
@@ -64,7 +65,7 @@ class TenantMiddleware(BaseHTTPMiddleware):
         # TODO: Validate tenant exists and is active in database
         # For now, just pass through
         
-        logger.debug(f"Request for tenant: {tenant_id}")
+        logger.debug("Request for tenant: %s", tenant_id)
         
         response = await call_next(request)
         return response
@@ -8,6 +8,7 @@ from .logging_config import (
     setup_logging,
     get_logger,
     set_request_context,
+    reset_request_context,
     clear_request_context,
     log_execution_time,
     log_exceptions,
@@ -25,6 +26,7 @@ __all__ = [
     'setup_logging',
     'get_logger',
     'set_request_context',
+    'reset_request_context',
     'clear_request_context',
     'log_execution_time',
     'log_exceptions',
@@ -11,6 +11,7 @@ import gzip
 import hashlib
 import json
 import pickle
+import sys
 import time
 from typing import Any, Optional, Dict, List, Callable, Union
 from datetime import timedelta
@@ -103,6 +104,9 @@ class CacheManager:
     # Compression threshold (1KB)
     COMPRESSION_THRESHOLD = 1024
     
+    # Keys requested per SCAN call during pattern invalidation
+    SCAN_BATCH_SIZE = 1000
+    
     def __init__(
         self,
         redis_url: Optional[str] = None,
@@ -457,22 +461,23 @@ class CacheManager:
             if self._redis_available:
                 try:
                     if pattern:
-                        # Delete by pattern
+                        # Delete by pattern; UNLINK frees memory in a
+                        # background thread instead of blocking Redis
                         cursor = 0
                         while True:
                             cursor, keys = await self._redis.scan(
                                 cursor=cursor,
                                 match=pattern,
-                                count=100
+                                count=self.SCAN_BATCH_SIZE
                             )
                             if keys:
-                                deleted = await self._redis.delete(*keys)
+                                deleted = await self._redis.unlink(*keys)
                                 count += deleted
                             if cursor == 0:
                                 break
                     else:
-                        # Clear all
-                        await self._redis.flushdb()
+                        # Clear all without blocking the Redis event loop
+                        await self._redis.flushdb(asynchronous=True)
                         count = -1  # Unknown count
                     
                     logger.info(f"Cache cleared (Redis): pattern={pattern}, count={count}")
@@ -738,14 +743,16 @@ def cached(ttl: int = 300, key_prefix: str = ""):
         >>>     return fetch_user_from_db(user_id)
     """
     def decorator(func: Callable) -> Callable:
+        # Resolved once; the module's cache_manager global is read per call
+        # since it is usually assigned after the decorated function is defined
+        module = sys.modules[func.__module__]
+        func_key_prefix = f"{key_prefix}:{func.__name__}"
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # Get cache manager from kwargs or use global instance
             cache_manager = kwargs.pop('_cache_manager', None)
             if not cache_manager:
-                # Try to get from function's module
-                import sys
-                module = sys.modules[func.__module__]
                 cache_manager = getattr(module, 'cache_manager', None)
             
             if not cache_manager:
@@ -754,14 +761,14 @@ def cached(ttl: int = 300, key_prefix: str = ""):
                 return await func(*args, **kwargs)
             
             # Generate cache key from function name and arguments
-            key_parts = [key_prefix, func.__name__]
+            key_parts = [func_key_prefix]
             key_parts.extend([str(arg) for arg in args])
             key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
             cache_key = ":".join(key_parts)
             
             # Hash long keys
             if len(cache_key) > 200:
-                cache_key = f"{key_prefix}:{func.__name__}:" + hashlib.md5(
+                cache_key = f"{func_key_prefix}:" + hashlib.md5(
                     cache_key.encode()
                 ).hexdigest()
             
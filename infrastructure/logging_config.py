@@ -5,6 +5,7 @@ This module provides comprehensive logging setup with JSON formatting, log rotat
 contextual logging, and request tracing capabilities.
 """
 
+import asyncio
 import logging
 import logging.config
 import logging.handlers
@@ -14,8 +15,8 @@ import time
 import functools
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, Callable
-from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, Tuple
+from contextvars import ContextVar, Token
 import json
 
 try:
@@ -29,6 +30,28 @@ request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=Non
 user_id_var: ContextVar[Optional[str]] = ContextVar('user_id', default=None)
 
 
+def _set_request_id(value: Optional[str]) -> Optional[Token]:
+    """
+    Set the current request ID.
+    
+    Returns the context variable token, or None if the value was unchanged.
+    """
+    if request_id_var.get() != value:
+        return request_id_var.set(value)
+    return None
+
+
+def _set_user_id(value: Optional[str]) -> Optional[Token]:
+    """
+    Set the current user ID.
+    
+    Returns the context variable token, or None if the value was unchanged.
+    """
+    if user_id_var.get() != value:
+        return user_id_var.set(value)
+    return None
+
+
 class ContextualFilter(logging.Filter):
     """Add contextual information to log records."""
     
@@ -39,6 +62,12 @@ class ContextualFilter(logging.Filter):
         return True
 
 
+@functools.lru_cache(maxsize=512)
+def _logger_fields(name: str, module: str) -> Dict[str, str]:
+    """Get the JSON fields that are constant for a given logger and module."""
+    return {'logger_name': name, 'module': module}
+
+
 class CustomJsonFormatter(jsonlogger.JsonFormatter if jsonlogger else logging.Formatter):
     """
     Custom JSON formatter with enhanced metadata.
@@ -53,10 +82,9 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter if jsonlogger else logging.Fo
         # Add standard fields
         log_record['timestamp'] = datetime.utcnow().isoformat() + 'Z'
         log_record['level'] = record.levelname
-        log_record['logger_name'] = record.name
+        log_record.update(_logger_fields(record.name, record.module))
         log_record['function_name'] = record.funcName
         log_record['line_number'] = record.lineno
-        log_record['module'] = record.module
         
         # Add contextual fields if available
         if hasattr(record, 'request_id') and record.request_id:
@@ -111,8 +139,8 @@ class PrettyConsoleFormatter(logging.Formatter):
         request_id = getattr(record, 'request_id', None)
         request_str = f" [{request_id}]" if request_id else ""
         
-        # Format message
-        message = record.getMessage()
+        # Format message (constant messages skip the % formatting machinery)
+        message = record.getMessage() if record.args else str(record.msg)
         
         # Combine all parts
         formatted = f"{timestamp} | {level} | {logger_name} | {location:30s}{request_str} | {message}"
@@ -302,24 +330,51 @@ def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 
-def set_request_context(request_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+def set_request_context(
+    request_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> Tuple[Optional[Token], Optional[Token]]:
     """
     Set contextual information for request tracing.
     
+    Values equal to the current ones are skipped, so no context token is
+    allocated for them.
+    
     Args:
         request_id: Unique request identifier (correlation ID).
         user_id: User identifier for the current request.
     
+    Returns:
+        Tuple of (request_id, user_id) context tokens that can be passed to
+        reset_request_context(). Entries are None when nothing was set.
+    
     Example:
         >>> import uuid
-        >>> set_request_context(request_id=str(uuid.uuid4()), user_id="user123")
+        >>> tokens = set_request_context(request_id=str(uuid.uuid4()), user_id="user123")
         >>> logger = get_logger(__name__)
         >>> logger.info("User action")  # Will include request_id and user_id
+        >>> reset_request_context(tokens)
+    """
+    request_token = _set_request_id(request_id) if request_id else None
+    user_token = _set_user_id(user_id) if user_id else None
+    return request_token, user_token
+
+
+def reset_request_context(tokens: Tuple[Optional[Token], Optional[Token]]) -> None:
+    """
+    Restore the request context to its state before set_request_context().
+    
+    Unwinding with the returned tokens keeps the context chain from growing
+    in long-running asyncio tasks.
+    
+    Args:
+        tokens: Tuple returned by set_request_context().
     """
-    if request_id:
-        request_id_var.set(request_id)
-    if user_id:
-        user_id_var.set(user_id)
+    request_token, user_token = tokens
+    if request_token is not None:
+        request_id_var.reset(request_token)
+    if user_token is not None:
+        user_id_var.reset(user_token)
 
 
 def clear_request_context() -> None:
@@ -329,8 +384,8 @@ def clear_request_context() -> None:
     Example:
         >>> clear_request_context()
     """
-    request_id_var.set(None)
-    user_id_var.set(None)
+    _set_request_id(None)
+    _set_user_id(None)
 
 
 def log_execution_time(func: Optional[Callable] = None, *, logger: Optional[logging.Logger] = None) -> Callable:
@@ -357,66 +412,55 @@ def log_execution_time(func: Optional[Callable] = None, *, logger: Optional[logg
         if logger is None:
             logger = get_logger(f.__module__)
         
+        # Constant parts of the log record, built once at decoration time
+        completed_msg = f"Function {f.__name__} completed"
+        failed_msg = f"Function {f.__name__} failed"
+        extra_ok = {'function': f.__name__, 'success': True}
+        extra_err = {'function': f.__name__, 'success': False}
+        
         @functools.wraps(f)
         def sync_wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_ns = time.monotonic_ns()
             try:
                 result = f(*args, **kwargs)
-                duration = time.time() - start_time
-                logger.info(
-                    f"Function {f.__name__} completed",
-                    extra={
-                        'function': f.__name__,
-                        'duration_seconds': round(duration, 3),
-                        'success': True,
-                    }
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
+                    logger.info(
+                        completed_msg,
+                        extra={**extra_ok, 'duration_ms': duration_ms}
+                    )
                 return result
             except Exception as e:
-                duration = time.time() - start_time
+                duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
                 logger.error(
-                    f"Function {f.__name__} failed",
-                    extra={
-                        'function': f.__name__,
-                        'duration_seconds': round(duration, 3),
-                        'success': False,
-                        'error': str(e),
-                    },
+                    failed_msg,
+                    extra={**extra_err, 'duration_ms': duration_ms, 'error': str(e)},
                     exc_info=True
                 )
                 raise
         
         @functools.wraps(f)
         async def async_wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_ns = time.monotonic_ns()
             try:
                 result = await f(*args, **kwargs)
-                duration = time.time() - start_time
-                logger.info(
-                    f"Function {f.__name__} completed",
-                    extra={
-                        'function': f.__name__,
-                        'duration_seconds': round(duration, 3),
-                        'success': True,
-                    }
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
+                    logger.info(
+                        completed_msg,
+                        extra={**extra_ok, 'duration_ms': duration_ms}
+                    )
                 return result
             except Exception as e:
-                duration = time.time() - start_time
+                duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
                 logger.error(
-                    f"Function {f.__name__} failed",
-                    extra={
-                        'function': f.__name__,
-                        'duration_seconds': round(duration, 3),
-                        'success': False,
-                        'error': str(e),
-                    },
+                    failed_msg,
+                    extra={**extra_err, 'duration_ms': duration_ms, 'error': str(e)},
                     exc_info=True
                 )
                 raise
         
         # Return appropriate wrapper based on function type
-        import asyncio
         if asyncio.iscoroutinefunction(f):
             return async_wrapper
         else:
@@ -454,17 +498,22 @@ def log_exceptions(func: Optional[Callable] = None, *, logger: Optional[logging.
         if logger is None:
             logger = get_logger(f.__module__)
         
+        func_name = f.__name__
+        
         @functools.wraps(f)
         def sync_wrapper(*args, **kwargs):
             try:
                 return f(*args, **kwargs)
             except Exception as e:
+                error_message = str(e)
                 logger.error(
-                    f"Exception in {f.__name__}: {str(e)}",
+                    "Exception in %s: %s",
+                    func_name,
+                    error_message,
                     extra={
-                        'function': f.__name__,
+                        'function': func_name,
                         'exception_type': type(e).__name__,
-                        'exception_message': str(e),
+                        'exception_message': error_message,
                     },
                     exc_info=True
                 )
@@ -476,12 +525,15 @@ def log_exceptions(func: Optional[Callable] = None, *, logger: Optional[logging.
             try:
                 return await f(*args, **kwargs)
             except Exception as e:
+                error_message = str(e)
                 logger.error(
-                    f"Exception in {f.__name__}: {str(e)}",
+                    "Exception in %s: %s",
+                    func_name,
+                    error_message,
                     extra={
-                        'function': f.__name__,
+                        'function': func_name,
                         'exception_type': type(e).__name__,
-                        'exception_message': str(e),
+                        'exception_message': error_message,
                     },
                     exc_info=True
                 )
@@ -489,7 +541,6 @@ def log_exceptions(func: Optional[Callable] = None, *, logger: Optional[logging.
                     raise
         
         # Return appropriate wrapper based on function type
-        import asyncio
         if asyncio.iscoroutinefunction(f):
             return async_wrapper
         else:
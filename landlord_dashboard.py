@@ -7,11 +7,10 @@ Real-time updates via WebSocket connection.
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import json
 import os
+import re
+from collections import deque
 
 # Support both old and new package structure for backward compatibility
 try:
@@ -48,6 +47,9 @@ from vs_components.components.pre1974_banner import (
 )
 # Note: Would need to import existing HPD/311 modules here
 
+# Most recent real-time updates kept in session state
+MAX_REALTIME_UPDATES = 200
+
 # Page configuration
 st.set_page_config(
     page_title="ViolationSentinel - Landlord Dashboard",
@@ -55,17 +57,19 @@ st.set_page_config(
     layout="wide"
 )
 
+# One timestamp for the whole script run
+now = datetime.now()
+
 # Initialize session state
-if 'dob_monitor' not in st.session_state:
-    st.session_state.dob_monitor = DOBViolationMonitor()
 if 'portfolio' not in st.session_state:
     st.session_state.portfolio = []
 if 'ws_connected' not in st.session_state:
     st.session_state.ws_connected = False
 if 'real_time_updates' not in st.session_state:
-    st.session_state.real_time_updates = []
+    # Bounded feed: the oldest updates are evicted once it is full
+    st.session_state.real_time_updates = deque(maxlen=MAX_REALTIME_UPDATES)
 if 'last_update_time' not in st.session_state:
-    st.session_state.last_update_time = datetime.now()
+    st.session_state.last_update_time = now
 if 'debug_mode' not in st.session_state:
     st.session_state.debug_mode = os.getenv('DEBUG_MODE', 'false').lower() == 'true'
 
@@ -75,376 +79,160 @@ WS_PORT = os.getenv('WEBSOCKET_PORT', '8765')
 WS_URL = f"ws://{WS_HOST}:{WS_PORT}"
 JWT_TOKEN = os.getenv('JWT_TOKEN', '')  # Should be set in production
 
-# Custom CSS with connection status indicator and animations
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1E3A8A;
-        font-weight: 800;
-        margin-bottom: 1rem;
-    }
-    .risk-critical { color: #DC2626; font-weight: bold; }
-    .risk-high { color: #EA580C; font-weight: bold; }
-    .risk-medium { color: #D97706; font-weight: bold; }
-    .risk-low { color: #059669; font-weight: bold; }
-    .risk-clean { color: #10B981; font-weight: bold; }
-    .property-card {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border: 1px solid #E5E7EB;
-        margin-bottom: 1rem;
-        background: white;
-    }
-    
-    /* Connection Status Indicator */
-    .connection-status {
-        display: inline-flex;
-        align-items: center;
-        padding: 0.5rem 1rem;
-        border-radius: 0.5rem;
-        font-weight: 600;
-        margin-left: 1rem;
-    }
-    .status-connected {
-        background-color: #D1FAE5;
-        color: #065F46;
-    }
-    .status-reconnecting {
-        background-color: #FEF3C7;
-        color: #92400E;
-    }
-    .status-disconnected {
-        background-color: #FEE2E2;
-        color: #991B1B;
-    }
-    .status-dot {
-        width: 10px;
-        height: 10px;
-        border-radius: 50%;
-        margin-right: 0.5rem;
-        display: inline-block;
-    }
-    .dot-green {
-        background-color: #10B981;
-        box-shadow: 0 0 10px #10B981;
-        animation: pulse-green 2s infinite;
-    }
-    .dot-yellow {
-        background-color: #F59E0B;
-        box-shadow: 0 0 10px #F59E0B;
-        animation: pulse-yellow 1s infinite;
-    }
-    .dot-red {
-        background-color: #EF4444;
-        box-shadow: 0 0 10px #EF4444;
-    }
-    
-    @keyframes pulse-green {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.5; }
-    }
-    @keyframes pulse-yellow {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.3; }
-    }
-    
-    /* Activity Feed */
-    .activity-feed {
-        max-height: 400px;
-        overflow-y: auto;
-        border: 1px solid #E5E7EB;
-        border-radius: 0.5rem;
-        padding: 1rem;
-        background: #F9FAFB;
-    }
-    .activity-item {
-        padding: 0.75rem;
-        border-left: 3px solid #3B82F6;
-        background: white;
-        margin-bottom: 0.5rem;
-        border-radius: 0.25rem;
-        animation: slideIn 0.3s ease-out;
-    }
-    .activity-item.critical {
-        border-left-color: #DC2626;
-        background: #FEF2F2;
-    }
-    @keyframes slideIn {
-        from {
-            opacity: 0;
-            transform: translateX(-20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-    
-    /* Badge Animations */
-    .violation-badge {
-        display: inline-block;
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        font-size: 0.875rem;
-        font-weight: 600;
-        animation: fadeIn 0.5s ease-out;
-    }
-    @keyframes fadeIn {
-        from { opacity: 0; }
-        to { opacity: 1; }
-    }
-    
-    /* Last Updated */
-    .last-updated {
-        font-size: 0.875rem;
-        color: #6B7280;
-        font-style: italic;
-    }
-    
-    /* Toast Notification */
-    .toast-notification {
-        position: fixed;
-        top: 80px;
-        right: 20px;
-        background: white;
-        border-left: 4px solid #3B82F6;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        padding: 1rem;
-        border-radius: 0.5rem;
-        z-index: 9999;
-        animation: slideInRight 0.3s ease-out;
-    }
-    .toast-notification.critical {
-        border-left-color: #DC2626;
-        background: #FEF2F2;
-    }
-    @keyframes slideInRight {
-        from {
-            opacity: 0;
-            transform: translateX(100px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# WebSocket JavaScript Component
-websocket_component = """
-<script>
-let ws = null;
-let reconnectAttempts = 0;
-const maxReconnectAttempts = 10;
-const baseDelay = 1000;
-
-function getConnectionStatus() {
-    if (!ws) return 'disconnected';
-    switch(ws.readyState) {
-        case WebSocket.CONNECTING: return 'connecting';
-        case WebSocket.OPEN: return 'connected';
-        case WebSocket.CLOSING: return 'disconnecting';
-        case WebSocket.CLOSED: return 'disconnected';
-        default: return 'disconnected';
-    }
-}
+# Matches a 10-digit BBL (ASCII digits only) in a single scan
+BBL_MATCH = re.compile(r'\d{10}', re.ASCII).fullmatch
 
-function updateConnectionUI(status) {
-    const statusElement = document.getElementById('ws-status');
-    if (!statusElement) return;
-    
-    let statusClass, dotClass, statusText;
-    
-    switch(status) {
-        case 'connected':
-            statusClass = 'status-connected';
-            dotClass = 'dot-green';
-            statusText = 'Connected';
-            break;
-        case 'connecting':
-        case 'reconnecting':
-            statusClass = 'status-reconnecting';
-            dotClass = 'dot-yellow';
-            statusText = status === 'reconnecting' ? 'Reconnecting...' : 'Connecting...';
-            break;
-        default:
-            statusClass = 'status-disconnected';
-            dotClass = 'dot-red';
-            statusText = 'Disconnected';
-    }
-    
-    statusElement.className = 'connection-status ' + statusClass;
-    statusElement.innerHTML = '<span class="status-dot ' + dotClass + '"></span>' + statusText;
-}
+# Dashboard CSS and JavaScript live alongside this file
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 
-function connectWebSocket() {
-    const wsUrl = '""" + WS_URL + """';
-    const jwtToken = '""" + JWT_TOKEN + """';
-    const properties = """ + json.dumps([p['bbl'] for p in st.session_state.portfolio]) + """;
-    const debugMode = """ + json.dumps(st.session_state.debug_mode) + """;
-    
-    try {
-        updateConnectionUI('connecting');
-        ws = new WebSocket(wsUrl);
-        
-        ws.onopen = function() {
-            console.log('WebSocket connected');
-            updateConnectionUI('connected');
-            reconnectAttempts = 0;
-            
-            // Authenticate
-            if (jwtToken) {
-                ws.send(JSON.stringify({
-                    type: 'AUTHENTICATE',
-                    token: jwtToken
-                }));
-            }
-            
-            // Subscribe to all properties
-            properties.forEach(function(bbl) {
-                ws.send(JSON.stringify({
-                    type: 'SUBSCRIBE',
-                    property_id: bbl
-                }));
-                if (debugMode) {
-                    console.log('Subscribed to property:', bbl);
-                }
-            });
-        };
-        
-        ws.onmessage = function(event) {
-            const message = JSON.parse(event.data);
-            
-            if (debugMode) {
-                console.log('WebSocket message:', message);
-            }
-            
-            // Handle different message types
-            if (message.type === 'VIOLATION_UPDATE') {
-                handleViolationUpdate(message);
-            } else if (message.type === 'PING') {
-                ws.send(JSON.stringify({type: 'PONG'}));
-            }
-        };
-        
-        ws.onerror = function(error) {
-            console.error('WebSocket error:', error);
-            updateConnectionUI('disconnected');
-        };
-        
-        ws.onclose = function() {
-            console.log('WebSocket closed');
-            updateConnectionUI('disconnected');
-            attemptReconnect();
-        };
-        
-    } catch (error) {
-        console.error('Failed to create WebSocket:', error);
-        updateConnectionUI('disconnected');
-        attemptReconnect();
-    }
+# CSS class for each risk level
+RISK_LEVEL_CLASSES = {
+    level: f"risk-{level.lower()}"
+    for level in ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'CLEAN')
 }
 
-function attemptReconnect() {
-    if (reconnectAttempts >= maxReconnectAttempts) {
-        console.log('Max reconnect attempts reached');
-        return;
-    }
-    
-    reconnectAttempts++;
-    const delay = Math.min(baseDelay * Math.pow(2, reconnectAttempts), 30000);
-    
-    updateConnectionUI('reconnecting');
-    console.log('Reconnecting in', delay, 'ms (attempt', reconnectAttempts, ')');
-    
-    setTimeout(connectWebSocket, delay);
-}
+# Violation columns shown in the details table
+VIOLATION_DISPLAY_COLS = ['violation_number', 'violation_type', 'issue_date',
+                          'violation_class', 'disposition']
 
-function handleViolationUpdate(message) {
-    const debugMode = """ + json.dumps(st.session_state.debug_mode) + """;
-    
-    // Play sound for critical violations
-    if (message.severity === 'critical') {
-        playAlertSound();
-    }
-    
-    // Show toast notification
-    showToast(message);
-    
-    // Trigger Streamlit rerun to update UI
-    if (window.parent && window.parent.postMessage) {
-        window.parent.postMessage({
-            type: 'streamlit:setComponentValue',
-            value: {
-                update: message,
-                timestamp: new Date().toISOString()
-            }
-        }, '*');
-    }
-}
 
-function showToast(message) {
-    const toast = document.createElement('div');
-    toast.className = 'toast-notification' + (message.severity === 'critical' ? ' critical' : '');
-    toast.innerHTML = `
-        <strong>${message.property_id}</strong><br>
-        ${message.type}: ${message.count || 0} violations
-    `;
-    
-    document.body.appendChild(toast);
-    
-    setTimeout(function() {
-        toast.style.animation = 'slideInRight 0.3s ease-out reverse';
-        setTimeout(function() {
-            document.body.removeChild(toast);
-        }, 300);
-    }, 5000);
-}
+@st.cache_resource
+def load_static_asset(name):
+    """Read a static asset once per server process."""
+    with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+        return f.read()
 
-function playAlertSound() {
-    // Create a simple beep using Web Audio API
-    try {
-        const audioContext = new (window.AudioContext || window.webkitAudioContext)();
-        const oscillator = audioContext.createOscillator();
-        const gainNode = audioContext.createGain();
-        
-        oscillator.connect(gainNode);
-        gainNode.connect(audioContext.destination);
-        
-        oscillator.frequency.value = 800;
-        oscillator.type = 'sine';
-        
-        gainNode.gain.setValueAtTime(0.3, audioContext.currentTime);
-        gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.5);
-        
-        oscillator.start(audioContext.currentTime);
-        oscillator.stop(audioContext.currentTime + 0.5);
-    } catch (error) {
-        console.error('Failed to play alert sound:', error);
-    }
-}
 
-// Initialize WebSocket on page load
-if (document.readyState === 'loading') {
-    document.addEventListener('DOMContentLoaded', connectWebSocket);
-} else {
-    connectWebSocket();
-}
+@st.cache_resource
+def get_dob_monitor():
+    """Shared DOB violation monitor; it keeps no per-session state."""
+    return DOBViolationMonitor()
+
 
-// Cleanup on page unload
-window.addEventListener('beforeunload', function() {
-    if (ws && ws.readyState === WebSocket.OPEN) {
-        ws.close();
+@st.cache_data(show_spinner=False)
+def build_pre1974_stats(portfolio_rows):
+    """Compute pre-1974 portfolio stats from (bbl, year built, district) rows."""
+    return calculate_portfolio_pre1974_stats(
+        [{'bbl': bbl, 'year_built': year_built} for bbl, year_built, _ in portfolio_rows]
+    )
+
+
+@st.cache_data(show_spinner=False)
+def estimate_heat_complaints(portfolio_rows):
+    """Map BBL to 30-day heat complaints for pre-1974 buildings."""
+    # Mock heat complaints for demonstration
+    # In production, this would fetch actual 311 data
+    return {
+        bbl: 4 if year_built < 1960 else 2
+        for bbl, year_built, _ in portfolio_rows
+        if year_built is not None and year_built < 1974
     }
-});
-</script>
-"""
 
-# Inject WebSocket component if portfolio exists
+
+@st.cache_data(show_spinner=False)
+def find_inspector_hotspots(portfolio_rows):
+    """Map BBL to inspector multiplier for buildings in inspector hotspots."""
+    hotspots = {}
+    for bbl, _, district in portfolio_rows:
+        if district:
+            multiplier = inspector_risk_multiplier(bbl, district)
+            if multiplier > 1.5:
+                hotspots[bbl] = multiplier
+    return hotspots
+
+
+@st.cache_data
+def build_property_tables(properties):
+    """Build the per-property summary table and the combined violations table."""
+    summary_df = pd.DataFrame({
+        'Property': [p['property_name'] for p in properties],
+        'BBL': [p['bbl'] for p in properties],
+        'Total Violations': [p['summary']['total'] for p in properties],
+        'Open Violations': [p['summary']['open'] for p in properties],
+        'Risk Level': [p['risk_level'] for p in properties],
+    })
+    
+    # Only the displayed fields are materialized; fields no violation has
+    # come back as all-NaN columns and are dropped
+    frames = [
+        pd.DataFrame(p['violations'], columns=VIOLATION_DISPLAY_COLS)
+        .assign(Property=p['property_name'])
+        for p in properties if p['violations']
+    ]
+    if not frames:
+        return summary_df, pd.DataFrame()
+    
+    violations_df = pd.concat(frames, ignore_index=True)
+    return summary_df, violations_df[['Property'] + VIOLATION_DISPLAY_COLS].dropna(axis=1, how='all')
+
+
+@st.cache_data
+def build_portfolio_figures(properties_rows, class_counts):
+    """
+    Build the portfolio analytics charts.
+    
+    Takes tuples of (property, total, open, risk level) rows and
+    (violation class, count) pairs so the figures are cached per scan.
+    Returns the bar chart and the class pie chart (None if no violations).
+    """
+    # Plotly is only needed once a scan has results to chart
+    import plotly.express as px
+    
+    df = pd.DataFrame(
+        properties_rows,
+        columns=['Property', 'Total Violations', 'Open Violations', 'Risk Level']
+    )
+    
+    # Bar chart of violations by property
+    fig1 = px.bar(df, x='Property', y='Total Violations', 
+                 title='Violations by Property',
+                 color='Risk Level',
+                 color_discrete_map={
+                     'CRITICAL': '#DC2626',
+                     'HIGH': '#EA580C',
+                     'MEDIUM': '#D97706',
+                     'LOW': '#059669',
+                     'CLEAN': '#10B981'
+                 })
+    
+    # Violation class breakdown
+    fig2 = None
+    class_names = [name for name, _ in class_counts]
+    class_values = [count for _, count in class_counts]
+    if sum(class_values) > 0:
+        fig2 = px.pie(names=class_names, 
+                    values=class_values,
+                    title='Violations by Class',
+                    color=class_names,
+                    color_discrete_map={
+                        'Class C': '#DC2626',
+                        'Class B': '#EA580C',
+                        'Class A': '#D97706'
+                    })
+    
+    return fig1, fig2
+
+
+# Custom CSS with connection status indicator and animations. Streamlit drops
+# elements a rerun does not redraw, so the style block is emitted every run;
+# only the file read is cached.
+st.markdown(f"<style>{load_static_asset('dashboard.css')}</style>", unsafe_allow_html=True)
+
+# WebSocket JavaScript component (static/violation_ws.js), preceded by the
+# per-page settings it reads and the MessagePack decoder for binary frames
 if st.session_state.portfolio:
-    st.components.v1.html(websocket_component, height=0)
+    ws_config = json.dumps({
+        'wsUrl': WS_URL,
+        'jwtToken': JWT_TOKEN,
+        'properties': [p['bbl'] for p in st.session_state.portfolio],
+        'debugMode': st.session_state.debug_mode,
+    }).replace('</', '<\\/')
+    st.components.v1.html(
+        f"<script>window.VS_CONFIG = {ws_config};</script>"
+        f"<script>{load_static_asset('msgpack_decode.js')}</script>"
+        f"<script>{load_static_asset('violation_ws.js')}</script>",
+        height=0
+    )
 
 # Header with connection status
 header_col1, header_col2 = st.columns([3, 1])
@@ -469,13 +257,13 @@ with st.sidebar:
         prop_year = st.number_input("Year Built", min_value=1800, max_value=2025, value=1965)
         
         if st.form_submit_button("Add to Portfolio"):
-            if len(prop_bbl) == 10 and prop_bbl.isdigit():
+            if BBL_MATCH(prop_bbl):
                 st.session_state.portfolio.append({
                     'name': prop_name,
                     'bbl': prop_bbl,
                     'units': prop_units,
                     'year_built': prop_year,
-                    'added': datetime.now().strftime('%Y-%m-%d')
+                    'added': now.strftime('%Y-%m-%d')
                 })
                 st.success(f"Added {prop_name} to portfolio")
             else:
@@ -514,12 +302,88 @@ with st.sidebar:
     
     # Actions
     if st.button("🔄 Scan All Properties", type="primary"):
-        st.session_state.scan_results = st.session_state.dob_monitor.check_portfolio(st.session_state.portfolio)
+        st.session_state.scan_results = get_dob_monitor().check_portfolio(st.session_state.portfolio)
         st.rerun()
     
     if st.button("📊 Generate Compliance Report"):
         st.info("Compliance report generation coming soon")
 
+# Dashboard sections are fragments so that interactions inside one only
+# rerun that section instead of the whole script
+@st.fragment
+def render_portfolio_metrics(results):
+    """Render the portfolio overview metrics and overall risk level."""
+    portfolio_summary = results['portfolio_summary']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Properties", len(results['properties']))
+    
+    with col2:
+        total_violations = portfolio_summary['total']
+        st.metric("Total Violations", total_violations)
+    
+    with col3:
+        open_violations = portfolio_summary['open']
+        st.metric("Open Violations", open_violations)
+    
+    with col4:
+        # Calculate overall risk
+        class_c = portfolio_summary['by_class'].get('Class C', 0)
+        class_b = portfolio_summary['by_class'].get('Class B', 0)
+        
+        if class_c > 0:
+            risk = "CRITICAL"
+        elif class_b > 2:
+            risk = "HIGH"
+        elif open_violations > 5:
+            risk = "MEDIUM"
+        elif total_violations > 0:
+            risk = "LOW"
+        else:
+            risk = "CLEAN"
+        
+        st.markdown(f"<div class='{RISK_LEVEL_CLASSES[risk]}'>Risk Level: {risk}</div>", unsafe_allow_html=True)
+
+
+@st.fragment
+def render_property_details(results):
+    """Render the per-property summary and violations tables."""
+    st.subheader("Property Violation Details")
+    
+    summary_df, violations_df = build_property_tables(results['properties'])
+    st.dataframe(summary_df, use_container_width=True, hide_index=True)
+    
+    # Show violation breakdown if any
+    if not violations_df.empty:
+        with st.expander("View Violations"):
+            st.dataframe(violations_df, use_container_width=True, hide_index=True)
+    
+    st.divider()
+
+
+@st.fragment
+def render_portfolio_analytics(results):
+    """Render the portfolio analytics charts."""
+    portfolio_summary = results['portfolio_summary']
+    
+    st.subheader("Portfolio Analytics")
+    
+    # Hashable summaries of the scan results key the figure cache
+    properties_rows = tuple(
+        (p['property_name'], p['summary']['total'], p['summary']['open'], p['risk_level'])
+        for p in results['properties']
+    )
+    class_counts = tuple(portfolio_summary['by_class'].items())
+    
+    if properties_rows:
+        fig1, fig2 = build_portfolio_figures(properties_rows, class_counts)
+        st.plotly_chart(fig1, use_container_width=True)
+        if fig2 is not None:
+            st.plotly_chart(fig2, use_container_width=True)
+
+
 # Main Dashboard
 if not st.session_state.portfolio:
     st.info("👈 Add properties to your portfolio using the sidebar to get started.")
@@ -544,57 +408,27 @@ else:
     # Portfolio Overview Metrics
     if 'scan_results' in st.session_state:
         results = st.session_state.scan_results
-        portfolio_summary = results['portfolio_summary']
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Properties", len(results['properties']))
-        
-        with col2:
-            total_violations = portfolio_summary['total']
-            st.metric("Total Violations", total_violations)
-        
-        with col3:
-            open_violations = portfolio_summary['open']
-            st.metric("Open Violations", open_violations)
-        
-        with col4:
-            # Calculate overall risk
-            class_c = portfolio_summary['by_class'].get('Class C', 0)
-            class_b = portfolio_summary['by_class'].get('Class B', 0)
-            
-            if class_c > 0:
-                risk = "CRITICAL"
-                risk_class = "risk-critical"
-            elif class_b > 2:
-                risk = "HIGH"
-                risk_class = "risk-high"
-            elif open_violations > 5:
-                risk = "MEDIUM"
-                risk_class = "risk-medium"
-            elif total_violations > 0:
-                risk = "LOW"
-                risk_class = "risk-low"
-            else:
-                risk = "CLEAN"
-                risk_class = "risk-clean"
-            
-            st.markdown(f"<div class='{risk_class}'>Risk Level: {risk}</div>", unsafe_allow_html=True)
+        render_portfolio_metrics(results)
         
         st.divider()
         
         # ===== COMPETITIVE MOAT FEATURES =====
         
         # Pre-1974 Risk Analysis
-        portfolio_df = pd.DataFrame(st.session_state.portfolio)
-        if 'year_built' in portfolio_df.columns:
-            pre1974_stats = calculate_portfolio_pre1974_stats(st.session_state.portfolio)
+        # Hashable fingerprint of the fields the risk features read; keys
+        # the cached computations so they only rerun when the portfolio changes
+        portfolio_rows = tuple(
+            (prop['bbl'], prop.get('year_built'), prop.get('council_district'))
+            for prop in st.session_state.portfolio
+        )
+        
+        if any(year_built is not None for _, year_built, _ in portfolio_rows):
+            pre1974_stats = build_pre1974_stats(portfolio_rows)
             
             if pre1974_stats['pre1974_count'] > 0:
                 st.subheader("🏗️ Pre-1974 Building Risk Assessment")
                 show_pre1974_stats(pre1974_stats)
-                show_pre1974_banner(portfolio_df)
+                show_pre1974_banner(pd.DataFrame(st.session_state.portfolio))
                 st.divider()
         
         # Winter Heat Season Alert (if applicable)
@@ -602,32 +436,25 @@ else:
             st.subheader("🌡️ Winter Heat Season Risk")
             st.info("**Active Heat Season (Oct 1 - May 31)**: Elevated Class C violation risk")
             
-            # Check for buildings with heat complaints (mock data for now)
-            # In production, this would fetch actual 311 data
-            heat_alert_buildings = []
-            for prop in st.session_state.portfolio:
-                year = prop.get('year_built', 2000)
-                if year < 1974:
-                    # Mock heat complaints for demonstration
-                    prop_with_complaints = prop.copy()
-                    prop_with_complaints['heat_complaints_30d'] = 4 if year < 1960 else 2
-                    heat_alert_buildings.append(prop_with_complaints)
+            heat_complaints = estimate_heat_complaints(portfolio_rows)
+            heat_alert_buildings = [
+                {**prop, 'heat_complaints_30d': heat_complaints[prop['bbl']]}
+                for prop in st.session_state.portfolio
+                if prop['bbl'] in heat_complaints
+            ]
             
             if heat_alert_buildings:
                 show_winter_heat_alert(heat_alert_buildings)
             st.divider()
         
         # Inspector Hotspot Analysis
-        if any('council_district' in prop for prop in st.session_state.portfolio):
-            hotspot_buildings = []
-            for prop in st.session_state.portfolio:
-                district = prop.get('council_district')
-                if district:
-                    multiplier = inspector_risk_multiplier(prop['bbl'], district)
-                    if multiplier > 1.5:
-                        prop_copy = prop.copy()
-                        prop_copy['inspector_multiplier'] = multiplier
-                        hotspot_buildings.append(prop_copy)
+        if any(district for _, _, district in portfolio_rows):
+            hotspot_multipliers = find_inspector_hotspots(portfolio_rows)
+            hotspot_buildings = [
+                {**prop, 'inspector_multiplier': hotspot_multipliers[prop['bbl']]}
+                for prop in st.session_state.portfolio
+                if prop['bbl'] in hotspot_multipliers
+            ]
             
             if hotspot_buildings:
                 show_inspector_hotspot_alert(hotspot_buildings)
@@ -635,94 +462,9 @@ else:
         
         # ===== END COMPETITIVE MOAT FEATURES =====
         
-        # Property Details
-        st.subheader("Property Violation Details")
-        
-        for prop_result in results['properties']:
-            with st.container():
-                col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
-                
-                with col1:
-                    st.markdown(f"**{prop_result['property_name']}** ({prop_result['bbl']})")
-                
-                with col2:
-                    violations = prop_result['summary']['total']
-                    open_vios = prop_result['summary']['open']
-                    st.markdown(
-                        f'<span class="violation-badge" style="background:#3B82F6; color:white;">Total: {violations}</span> '
-                        f'<span class="violation-badge" style="background:#EF4444; color:white;">Open: {open_vios}</span>',
-                        unsafe_allow_html=True
-                    )
-                
-                with col3:
-                    risk = prop_result['risk_level']
-                    risk_class = f"risk-{risk.lower()}" if risk != "CLEAN" else "risk-clean"
-                    st.markdown(f"<div class='{risk_class}'>Risk: {risk}</div>", unsafe_allow_html=True)
-                
-                with col4:
-                    # Auto-refresh indicator
-                    st.markdown(
-                        '<span style="font-size:0.75rem; color:#6B7280;">🔄 Live</span>',
-                        unsafe_allow_html=True
-                    )
-                
-                # Show violation breakdown if any
-                if prop_result['violations']:
-                    with st.expander("View Violations"):
-                        violations_df = pd.DataFrame(prop_result['violations'])
-                        if not violations_df.empty:
-                            # Select and rename columns for display
-                            display_cols = ['violation_number', 'violation_type', 'issue_date', 
-                                          'violation_class', 'disposition']
-                            available_cols = [col for col in display_cols if col in violations_df.columns]
-                            
-                            if available_cols:
-                                st.dataframe(violations_df[available_cols], use_container_width=True)
-                
-                st.divider()
-        
-        # Visualization
-        st.subheader("Portfolio Analytics")
+        render_property_details(results)
         
-        # Create summary data for charts
-        properties_data = []
-        for prop_result in results['properties']:
-            properties_data.append({
-                'Property': prop_result['property_name'],
-                'Total Violations': prop_result['summary']['total'],
-                'Open Violations': prop_result['summary']['open'],
-                'Risk Level': prop_result['risk_level']
-            })
-        
-        if properties_data:
-            df = pd.DataFrame(properties_data)
-            
-            # Bar chart of violations by property
-            fig1 = px.bar(df, x='Property', y='Total Violations', 
-                         title='Violations by Property',
-                         color='Risk Level',
-                         color_discrete_map={
-                             'CRITICAL': '#DC2626',
-                             'HIGH': '#EA580C',
-                             'MEDIUM': '#D97706',
-                             'LOW': '#059669',
-                             'CLEAN': '#10B981'
-                         })
-            st.plotly_chart(fig1, use_container_width=True)
-            
-            # Violation class breakdown
-            class_data = portfolio_summary['by_class']
-            if sum(class_data.values()) > 0:
-                fig2 = px.pie(names=list(class_data.keys()), 
-                            values=list(class_data.values()),
-                            title='Violations by Class',
-                            color=list(class_data.keys()),
-                            color_discrete_map={
-                                'Class C': '#DC2626',
-                                'Class B': '#EA580C',
-                                'Class A': '#D97706'
-                            })
-                st.plotly_chart(fig2, use_container_width=True)
+        render_portfolio_analytics(results)
     
     else:
         st.info("Click 'Scan All Properties' in the sidebar to check for violations.")
@@ -731,7 +473,7 @@ else:
 st.divider()
 col1, col2 = st.columns([2, 1])
 with col1:
-    st.caption("ViolationSentinel v1.0 • Last updated: " + datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    st.caption("ViolationSentinel v1.0 • Last updated: " + now.strftime('%Y-%m-%d %H:%M:%S'))
     st.caption("Monitoring: DOB Violations • HPD Violations • 311 Complaints")
 with col2:
     if st.session_state.portfolio:
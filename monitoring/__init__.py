@@ -6,6 +6,7 @@ Provides real-time monitoring and WebSocket communication capabilities.
 
 from .websocket_server import (
     WebSocketServer,
+    SubscriptionTrie,
     WebSocketError,
     AuthenticationError,
     RateLimitError,
@@ -16,6 +17,7 @@ from .websocket_server import (
 
 __all__ = [
     'WebSocketServer',
+    'SubscriptionTrie',
     'WebSocketError',
     'AuthenticationError',
     'RateLimitError',
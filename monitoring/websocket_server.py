@@ -3,15 +3,21 @@ Production WebSocket server for real-time property monitoring.
 
 This module provides a scalable WebSocket server that supports 10,000+ concurrent
 connections for real-time updates on property violations and compliance data.
+
+At that scale run it on uvloop, which is used automatically by the example
+entry point when installed.
 """
 
 import asyncio
 import json
+import re
 import time
+import functools
+import itertools
 import jwt
-from typing import Dict, Set, Optional, Any, List
+from typing import Dict, FrozenSet, Set, Optional, Any, List, Union
 from datetime import datetime, timedelta
-from collections import deque
+from collections import OrderedDict, deque
 import logging
 
 try:
@@ -23,6 +29,27 @@ except ImportError:
     WebSocketServerProtocol = object
     WEBSOCKETS_AVAILABLE = False
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    uvloop = None
+    UVLOOP_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 try:
     from prometheus_client import Counter, Gauge, Histogram
     PROMETHEUS_AVAILABLE = True
@@ -45,6 +72,67 @@ except ImportError:
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+# Wire encodings a client can pick when authenticating; JSON goes out as
+# text frames and MessagePack as binary frames
+ENCODINGS = ('json', 'msgpack') if MSGPACK_AVAILABLE else ('json',)
+
+
+def encode_message(message: Any, encoding: str = 'json') -> Union[str, bytes]:
+    """
+    Serialize a message into a frame payload.
+    
+    JSON uses orjson when installed and is returned as str, because
+    clients treat binary frames as MessagePack. MessagePack is returned
+    as bytes.
+    """
+    if encoding == 'msgpack':
+        return msgpack.packb(message)
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message)
+
+
+def decode_message(raw_message, encoding: str = 'json') -> Any:
+    """
+    Parse an inbound frame.
+    
+    Binary frames from MessagePack clients are unpacked; everything else
+    is parsed as JSON (str or bytes).
+    """
+    if encoding == 'msgpack' and isinstance(raw_message, bytes):
+        try:
+            return msgpack.unpackb(raw_message)
+        except ValueError as e:
+            raise MessageValidationError("Invalid MessagePack") from e
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw_message)
+    return json.loads(raw_message)
+
+
+def batch_frame(payloads: List[Union[str, bytes]], encoding: str = 'json') -> Union[str, bytes]:
+    """Combine encoded messages into one array frame without re-encoding them."""
+    if encoding == 'msgpack':
+        count = len(payloads)
+        if count < 16:
+            header = bytes((0x90 | count,))
+        elif count < 0x10000:
+            header = b'\xdc' + count.to_bytes(2, 'big')
+        else:
+            header = b'\xdd' + count.to_bytes(4, 'big')
+        return header + b''.join(payloads)
+    return '[' + ','.join(payloads) + ']'
+
+
+@functools.lru_cache(maxsize=64)
+def _error_frame(error: str, encoding: str = 'json') -> Union[str, bytes]:
+    """Encoded ERROR frame; error texts are a small fixed set."""
+    return encode_message({'type': 'ERROR', 'message': error}, encoding)
+
+
+# Frames with no per-connection content are encoded once at import
+PONG_FRAMES = {encoding: encode_message({'type': 'PONG'}, encoding) for encoding in ENCODINGS}
+
 # Prometheus Metrics
 CONNECTIONS_TOTAL = Counter(
     'websocket_connections_total',
@@ -65,13 +153,35 @@ MESSAGE_LATENCY = Histogram(
     'WebSocket message processing latency',
     ['type']
 )
+# Not labelled by property id: ids are client-supplied, so each one would
+# create a new time series
 SUBSCRIPTION_COUNT = Gauge(
     'websocket_subscriptions_total',
-    'Total number of active subscriptions',
-    ['property_id']
+    'Total number of active subscriptions'
 )
 
 
+class _LabelCache(dict):
+    """Children of a labelled metric, resolved once per label value."""
+    
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+    
+    def __missing__(self, key):
+        child = self[key] = self.factory(key)
+        return child
+
+
+# labels() validates and hashes its arguments on every call, so the
+# per-message metrics reuse their resolved children instead
+INBOUND_MESSAGES = _LabelCache(lambda message_type: MESSAGES_TOTAL.labels(type=message_type, direction='inbound'))
+OUTBOUND_MESSAGES = _LabelCache(lambda message_type: MESSAGES_TOTAL.labels(type=message_type, direction='outbound'))
+MESSAGE_LATENCY_BY_TYPE = _LabelCache(lambda message_type: MESSAGE_LATENCY.labels(type=message_type))
+CONNECTIONS_ACCEPTED = CONNECTIONS_TOTAL.labels(status='accepted')
+CONNECTIONS_REJECTED = CONNECTIONS_TOTAL.labels(status='rejected')
+
+
 class WebSocketError(Exception):
     """Base exception for WebSocket errors."""
     pass
@@ -93,7 +203,9 @@ class MessageValidationError(WebSocketError):
 
 
 class RateLimiter:
-    """Per-connection rate limiter."""
+    """Per-connection token-bucket rate limiter."""
+    
+    __slots__ = ('max_messages', 'window_seconds', 'refill_rate', 'tokens', 'last_refill')
     
     def __init__(self, max_messages: int = 100, window_seconds: int = 60):
         """
@@ -105,39 +217,59 @@ class RateLimiter:
         """
         self.max_messages = max_messages
         self.window_seconds = window_seconds
-        self.messages: deque = deque()
+        # Bucket starts full and refills continuously at max_messages per window
+        self.refill_rate = max_messages / window_seconds
+        self.tokens = float(max_messages)
+        self.last_refill = time.monotonic()
     
-    def check_rate_limit(self) -> bool:
+    def check_rate_limit(self, now: Optional[float] = None) -> bool:
         """
         Check if rate limit is exceeded.
         
+        Args:
+            now: Current time.monotonic() reading, if the caller has one
+        
         Returns:
             True if within limit, False if exceeded
         """
-        now = time.time()
+        if now is None:
+            now = time.monotonic()
         
-        # Remove old messages outside the window
-        while self.messages and self.messages[0] < now - self.window_seconds:
-            self.messages.popleft()
+        # Refill for the time elapsed since the last check
+        self.tokens = min(self.max_messages, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
         
         # Check if limit exceeded
-        if len(self.messages) >= self.max_messages:
+        if self.tokens < 1:
             return False
         
-        # Add new message timestamp
-        self.messages.append(now)
+        self.tokens -= 1
         return True
 
 
 class Connection:
     """Represents a WebSocket connection."""
     
+    # One instance per client, so no per-instance __dict__
+    __slots__ = (
+        'websocket', 'connection_id', 'remote_addr', 'authenticated', 'user_id',
+        'subscriptions', 'rate_limiter', 'connected_at', 'last_ping', 'message_queue',
+        'is_relay', 'role', 'encoding', 'batch_updates', '_pending', '_flush_task',
+    )
+    
+    # How long broadcasts are buffered for connections in batch mode
+    BATCH_WINDOW = 0.005  # seconds
+    
+    # Messages kept for a client whose sends failed
+    MESSAGE_QUEUE_SIZE = 100
+    
     def __init__(
         self,
         websocket: WebSocketServerProtocol,
-        connection_id: str,
+        connection_id: int,
         authenticated: bool = False,
         user_id: Optional[str] = None,
+        remote_addr: Optional[str] = None,
     ):
         """
         Initialize connection.
@@ -147,16 +279,29 @@ class Connection:
             connection_id: Unique connection identifier
             authenticated: Whether connection is authenticated
             user_id: User identifier if authenticated
+            remote_addr: Client "host:port", for logging
         """
         self.websocket = websocket
         self.connection_id = connection_id
+        self.remote_addr = remote_addr
         self.authenticated = authenticated
         self.user_id = user_id
         self.subscriptions: Set[str] = set()
         self.rate_limiter = RateLimiter()
         self.connected_at = time.time()
         self.last_ping = time.time()
-        self.message_queue: deque = deque(maxlen=100)  # Store last 100 messages
+        # Offline queue of (message, timestamp); most connections never need
+        # one, so it is created on the first failed send
+        self.message_queue: Optional[deque] = None
+        
+        self.is_relay = False  # Upstream server forwarding broadcasts
+        self.role: Optional[str] = None  # 'role' claim of the JWT
+        self.encoding = 'json'  # Wire encoding chosen at AUTHENTICATE
+        
+        # Batch mode: broadcasts are coalesced into one array frame
+        self.batch_updates = False
+        self._pending: List[tuple] = []  # (payload, message) awaiting flush
+        self._flush_task: Optional[asyncio.Task] = None
     
     async def send_message(self, message: Dict[str, Any]) -> bool:
         """
@@ -169,19 +314,240 @@ class Connection:
             True if sent successfully, False otherwise
         """
         try:
-            await self.websocket.send(json.dumps(message))
-            MESSAGES_TOTAL.labels(type=message.get('type', 'unknown'), direction='outbound').inc()
+            await self.websocket.send(encode_message(message, self.encoding))
+            OUTBOUND_MESSAGES[message.get('type', 'unknown')].inc()
             return True
         except Exception as e:
             logger.error(f"Failed to send message to {self.connection_id}: {e}")
             return False
     
+    async def send_raw(self, payload: Union[str, bytes]) -> bool:
+        """
+        Send an already-serialized frame to client.
+        
+        Metrics are left to the caller, which serialized the payload once
+        for many connections.
+        
+        Args:
+            payload: Message encoded in this connection's encoding
+        
+        Returns:
+            True if sent successfully, False otherwise
+        """
+        try:
+            await self.websocket.send(payload)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send message to {self.connection_id}: {e}")
+            return False
+    
+    async def send_error(self, error: str) -> bool:
+        """
+        Send ERROR message to client.
+        
+        Args:
+            error: Human-readable error description
+        
+        Returns:
+            True if sent successfully, False otherwise
+        """
+        if await self.send_raw(_error_frame(error, self.encoding)):
+            OUTBOUND_MESSAGES['ERROR'].inc()
+            return True
+        return False
+    
+    def queue_broadcast(self, payload: Union[str, bytes], message: Dict[str, Any]):
+        """
+        Buffer a broadcast frame for batch delivery.
+        
+        Frames buffered within BATCH_WINDOW of the first are sent
+        together as a single array frame.
+        
+        Args:
+            payload: Message encoded in this connection's encoding
+            message: Message dictionary, queued if the send fails
+        """
+        self._pending.append((payload, message))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_pending())
+    
+    async def _flush_pending(self):
+        """Send buffered broadcast frames as one array frame."""
+        await asyncio.sleep(self.BATCH_WINDOW)
+        self._flush_task = None
+        await self._send_batch(self._take_pending(), self.encoding)
+    
+    async def _send_batch(self, pending: List[tuple], encoding: str):
+        """Send (payload, message) pairs encoded in encoding as one array frame."""
+        if not pending:
+            return
+        frame = batch_frame([payload for payload, _ in pending], encoding)
+        if not await self.send_raw(frame):
+            for _, message in pending:
+                self.add_to_queue(message)
+    
+    def _take_pending(self) -> List[tuple]:
+        """Remove and return the buffered frames, cancelling their flush."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        pending, self._pending = self._pending, []
+        return pending
+    
+    async def set_encoding(self, encoding: str):
+        """
+        Switch the wire encoding.
+        
+        Buffered broadcast frames were encoded in the old encoding, so they
+        are taken out and sent in it before anything new is buffered.
+        """
+        if encoding == self.encoding:
+            return
+        pending, previous = self._take_pending(), self.encoding
+        self.encoding = encoding
+        await self._send_batch(pending, previous)
+    
+    def cancel_pending(self):
+        """Drop buffered broadcast frames (connection is going away)."""
+        self._take_pending()
+    
     def add_to_queue(self, message: Dict[str, Any]):
-        """Add message to offline queue."""
-        self.message_queue.append({
-            'message': message,
-            'timestamp': time.time(),
-        })
+        """Add message to offline queue, dropping the oldest when full."""
+        if self.message_queue is None:
+            self.message_queue = deque(maxlen=self.MESSAGE_QUEUE_SIZE)
+        self.message_queue.append((message, time.time()))
+
+
+class _TrieNode:
+    """
+    Node in a SubscriptionTrie.
+    
+    Subscriber sets are frozensets that are replaced, never mutated, so a
+    broadcast can iterate the set it matched while clients (un)subscribe.
+    """
+    
+    __slots__ = ('children', 'exact', 'prefix')
+    
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.exact: FrozenSet[int] = frozenset()   # Subscribers to exactly this property id
+        self.prefix: FrozenSet[int] = frozenset()  # Subscribers to every id under this prefix
+
+
+class SubscriptionTrie:
+    """
+    Prefix tree mapping property ids to subscribed connection ids.
+    
+    BBLs in the same borough and block share a prefix, so they share
+    nodes. A key ending in '*' subscribes to every property id that
+    starts with the rest of the key. For example, '1*' covers all of
+    Manhattan and '101265*' covers one block.
+    """
+    
+    WILDCARD = '*'
+    
+    def __init__(self):
+        self.root = _TrieNode()
+        self._size = 0  # Keys with at least one subscriber
+        self.subscription_count = 0  # (key, connection) pairs
+    
+    def _split(self, key: str):
+        if key.endswith(self.WILDCARD):
+            return key[:-1], True
+        return key, False
+    
+    def add(self, key: str, connection_id: int) -> bool:
+        """Subscribe a connection to a key. Returns True if newly added."""
+        path, wildcard = self._split(key)
+        node = self.root
+        for char in path:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        
+        slot = 'prefix' if wildcard else 'exact'
+        subscribers = getattr(node, slot)
+        if connection_id in subscribers:
+            return False
+        if not subscribers:
+            self._size += 1
+        setattr(node, slot, subscribers | {connection_id})
+        self.subscription_count += 1
+        return True
+    
+    def discard(self, key: str, connection_id: int) -> bool:
+        """
+        Unsubscribe a connection from a key, pruning emptied branches.
+        
+        Returns:
+            True if the connection was subscribed, False otherwise
+        """
+        path, wildcard = self._split(key)
+        node = self.root
+        trail = []
+        for char in path:
+            child = node.children.get(char)
+            if child is None:
+                return False
+            trail.append((node, char))
+            node = child
+        
+        slot = 'prefix' if wildcard else 'exact'
+        subscribers = getattr(node, slot)
+        if connection_id not in subscribers:
+            return False
+        subscribers = subscribers - {connection_id}
+        setattr(node, slot, subscribers)
+        self.subscription_count -= 1
+        if not subscribers:
+            self._size -= 1
+        
+        # Walk back up removing nodes that no longer lead anywhere
+        for parent, char in reversed(trail):
+            if node.children or node.exact or node.prefix:
+                break
+            del parent.children[char]
+            node = parent
+        return True
+    
+    def match(self, property_id: str) -> FrozenSet[int]:
+        """
+        Return the connections subscribed to a property id, directly or by prefix.
+        
+        When only one key matches, its stored frozenset is returned as is,
+        so the common exact-match broadcast copies nothing.
+        """
+        node = self.root
+        matched = node.prefix
+        for char in property_id:
+            node = node.children.get(char)
+            if node is None:
+                return matched
+            if node.prefix:
+                matched = matched | node.prefix if matched else node.prefix
+        if node.exact:
+            matched = matched | node.exact if matched else node.exact
+        return matched
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+
+# Property ids are reduced to ASCII alphanumerics (plus a trailing wildcard)
+_NON_ALNUM = re.compile(r'[^A-Za-z0-9]')
+
+
+@functools.lru_cache(maxsize=4096)
+def _clean_property_id(property_id: str) -> str:
+    """Sanitize a property id; clients resend the same BBLs, so results are cached."""
+    cleaned = _NON_ALNUM.sub('', property_id)
+    if cleaned and property_id.endswith(SubscriptionTrie.WILDCARD):
+        cleaned += SubscriptionTrie.WILDCARD
+    return cleaned
 
 
 class WebSocketServer:
@@ -197,8 +563,35 @@ class WebSocketServer:
     - Graceful connection cleanup
     - Message queue for offline clients
     - Prometheus metrics
+    - Relay peers for tree-shaped fan-out across servers
     """
     
+    # Upper bound on properties in a single SUBSCRIBE_BATCH message
+    MAX_BATCH_SUBSCRIBE = 1000
+    
+    # Upper bound on subscriptions held by one connection
+    MAX_SUBSCRIPTIONS_PER_CONNECTION = 1000
+    
+    # Wildcard subscriptions expose many properties at once, so they need one
+    # of these JWT roles and at least a borough digit plus 5-digit block
+    WILDCARD_SUBSCRIBE_ROLES = frozenset({'admin'})
+    MIN_WILDCARD_PREFIX = 6
+    
+    # Longer property ids are sanitized without going through the cache
+    MAX_CACHED_PROPERTY_ID = 64
+    
+    # Message types that must carry a property_id
+    PROPERTY_MESSAGE_TYPES = frozenset({'SUBSCRIBE', 'UNSUBSCRIBE', 'RELAY'})
+    
+    # Longest wait between reconnection attempts to a relay peer
+    MAX_RELAY_BACKOFF = 30  # seconds
+    
+    # A relay peer that takes longer than this to accept a frame is skipped
+    RELAY_SEND_TIMEOUT = 5  # seconds
+    
+    # Decoded JWT payloads kept per token so re-authentication skips the HMAC check
+    JWT_CACHE_SIZE = 10000
+    
     def __init__(
         self,
         host: str = '0.0.0.0',
@@ -208,6 +601,9 @@ class WebSocketServer:
         max_connections: int = 10000,
         rate_limit_messages: int = 100,
         rate_limit_window: int = 60,
+        relay_peers: Optional[List[str]] = None,
+        relay_token: Optional[str] = None,
+        max_concurrent_handlers: int = 1024,
     ):
         """
         Initialize WebSocket server.
@@ -216,10 +612,16 @@ class WebSocketServer:
             host: Host to bind to
             port: Port to listen on
             jwt_secret: Secret key for JWT validation
-            heartbeat_interval: Ping interval in seconds
+            heartbeat_interval: Protocol-level ping interval in seconds
             max_connections: Maximum concurrent connections
             rate_limit_messages: Max messages per window
             rate_limit_window: Rate limit window in seconds
+            relay_peers: ws:// URLs of downstream servers that every
+                broadcast is forwarded to; peers must form a tree
+            relay_token: JWT presented to relay peers, carrying
+                "role": "relay" and signed with the peers' secret
+            max_concurrent_handlers: Inbound messages processed at once
+                across all connections
         """
         if not WEBSOCKETS_AVAILABLE:
             raise ImportError("websockets library is required. Install with: pip install websockets")
@@ -232,14 +634,39 @@ class WebSocketServer:
         self.rate_limit_messages = rate_limit_messages
         self.rate_limit_window = rate_limit_window
         
+        # Caps in-flight message handling so a burst from many clients waits
+        # in the sockets (max_queue backpressure) instead of in memory
+        self._handler_semaphore = asyncio.Semaphore(max_concurrent_handlers)
+        
+        # Message type -> handler; also the set of types accepted from clients
+        self._handlers = {
+            'AUTHENTICATE': self._handle_authenticate,
+            'SUBSCRIBE': self._handle_subscribe,
+            'SUBSCRIBE_BATCH': self._handle_subscribe_batch,
+            'UNSUBSCRIBE': self._handle_unsubscribe,
+            'GET_STATUS': self._handle_get_status,
+            'PING': self._handle_ping,
+            'RELAY': self._handle_relay,
+        }
+        
+        self._jwt_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        
         # Connection tracking
-        self.connections: Dict[str, Connection] = {}
-        self.subscriptions: Dict[str, Set[str]] = {}  # property_id -> set of connection_ids
+        self.connections: Dict[int, Connection] = {}
+        self._connection_ids = itertools.count(1)
+        self.authenticated_count = 0
+        self.subscriptions = SubscriptionTrie()  # property_id (or prefix*) -> connection_ids
+        
+        # Relay links to downstream servers, keyed by peer URL
+        self.relay_peers: List[str] = list(relay_peers or [])
+        self.relay_token = relay_token
+        self._relay_links: Dict[str, Any] = {}
+        self._relay_tasks: List[asyncio.Task] = []
+        self._relay_sends: Set[asyncio.Task] = set()  # in-flight _relay calls
         
         # Server state
         self.server = None
         self.running = False
-        self.heartbeat_task = None
         
         logger.info(
             "WebSocketServer initialized",
@@ -260,15 +687,30 @@ class WebSocketServer:
         Returns:
             Decoded token payload or None if invalid
         """
+        payload = self._jwt_cache.get(token)
+        if payload is not None:
+            # Signature was already verified; only expiry can change
+            exp = payload.get('exp')
+            if exp is None or exp > time.time():
+                self._jwt_cache.move_to_end(token)
+                return payload
+            del self._jwt_cache[token]
+            logger.warning("JWT token expired")
+            return None
+        
         try:
             payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
-            return payload
         except jwt.ExpiredSignatureError:
             logger.warning("JWT token expired")
             return None
         except jwt.InvalidTokenError as e:
             logger.warning(f"Invalid JWT token: {e}")
             return None
+        
+        self._jwt_cache[token] = payload
+        if len(self._jwt_cache) > self.JWT_CACHE_SIZE:
+            self._jwt_cache.popitem(last=False)
+        return payload
     
     def _validate_message(self, message: Dict[str, Any]) -> bool:
         """
@@ -280,19 +722,22 @@ class WebSocketServer:
         Returns:
             True if valid, False otherwise
         """
-        # Check required fields
-        if 'type' not in message:
-            return False
-        
-        # Validate message type
-        valid_types = ['SUBSCRIBE', 'UNSUBSCRIBE', 'GET_STATUS', 'PING', 'AUTHENTICATE']
-        if message['type'] not in valid_types:
+        # Validate message type (a missing or non-string type is invalid)
+        message_type = message.get('type')
+        if not isinstance(message_type, str) or message_type not in self._handlers:
             return False
         
         # Type-specific validation
-        if message['type'] in ['SUBSCRIBE', 'UNSUBSCRIBE']:
+        if message_type in self.PROPERTY_MESSAGE_TYPES:
             if 'property_id' not in message:
                 return False
+            if message_type == 'RELAY' and not isinstance(message.get('message'), dict):
+                return False
+        
+        elif message_type == 'SUBSCRIBE_BATCH':
+            property_ids = message.get('property_ids')
+            if not isinstance(property_ids, list) or len(property_ids) > self.MAX_BATCH_SUBSCRIBE:
+                return False
         
         return True
     
@@ -312,40 +757,69 @@ class WebSocketServer:
         }
         
         if 'property_id' in message:
-            # Sanitize property_id to alphanumeric only
-            property_id = str(message['property_id'])
-            sanitized['property_id'] = ''.join(c for c in property_id if c.isalnum())
+            sanitized['property_id'] = self._sanitize_property_id(message['property_id'])
+        
+        if sanitized['type'] == 'SUBSCRIBE_BATCH':
+            # Only sanitized once _validate_message has checked the list and its size
+            property_ids = (
+                self._sanitize_property_id(property_id)
+                for property_id in message['property_ids']
+            )
+            sanitized['property_ids'] = [property_id for property_id in property_ids if property_id]
         
         if 'token' in message:
             sanitized['token'] = str(message['token'])
         
+        if 'batch' in message:
+            sanitized['batch'] = message['batch'] is True
+        
+        if message.get('encoding') in ENCODINGS:
+            sanitized['encoding'] = message['encoding']
+        
+        if sanitized['type'] == 'RELAY':
+            # Relayed payloads come from authenticated peers and pass through as-is
+            sanitized['message'] = message['message']
+        
         return sanitized
     
+    @classmethod
+    def _sanitize_property_id(cls, property_id: Any) -> str:
+        """
+        Reduce a property id to alphanumerics, keeping a trailing wildcard.
+        
+        A bare '*' sanitizes to '' so clients cannot subscribe to everything.
+        """
+        property_id = str(property_id)
+        if len(property_id) > cls.MAX_CACHED_PROPERTY_ID:
+            return _clean_property_id.__wrapped__(property_id)
+        return _clean_property_id(property_id)
+    
     async def _handle_authenticate(self, conn: Connection, message: Dict[str, Any]):
         """Handle AUTHENTICATE message."""
         token = message.get('token')
         if not token:
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Token required',
-            })
+            await conn.send_error('Token required')
             return
         
         payload = self._validate_jwt(token)
         if not payload:
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Invalid or expired token',
-            })
+            await conn.send_error('Invalid or expired token')
             return
         
         # Update connection with authentication info
+        if not conn.authenticated:
+            self.authenticated_count += 1
         conn.authenticated = True
         conn.user_id = payload.get('user_id')
+        conn.role = payload.get('role')
+        conn.is_relay = conn.role == 'relay'
+        # Replies from here on use the requested encoding, if supported
+        await conn.set_encoding(message.get('encoding', 'json'))
         
         await conn.send_message({
             'type': 'AUTHENTICATED',
             'user_id': conn.user_id,
+            'encoding': conn.encoding,
         })
         
         logger.info(f"Connection {conn.connection_id} authenticated as {conn.user_id}")
@@ -353,28 +827,26 @@ class WebSocketServer:
     async def _handle_subscribe(self, conn: Connection, message: Dict[str, Any]):
         """Handle SUBSCRIBE message."""
         if not conn.authenticated:
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Authentication required',
-            })
+            await conn.send_error('Authentication required')
             return
         
         property_id = message.get('property_id')
         if not property_id:
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Property ID required',
-            })
+            await conn.send_error('Property ID required')
             return
         
-        # Add subscription
-        conn.subscriptions.add(property_id)
+        error = self._wildcard_error(conn, property_id)
+        if error:
+            await conn.send_error(error)
+            return
         
-        if property_id not in self.subscriptions:
-            self.subscriptions[property_id] = set()
-        self.subscriptions[property_id].add(conn.connection_id)
+        if property_id not in conn.subscriptions and self._subscription_limit_reached(conn, 1):
+            await conn.send_error('Subscription limit exceeded')
+            return
         
-        SUBSCRIPTION_COUNT.labels(property_id=property_id).inc()
+        if message.get('batch'):
+            conn.batch_updates = True
+        self._add_subscription(conn, property_id)
         
         await conn.send_message({
             'type': 'SUBSCRIBED',
@@ -383,24 +855,72 @@ class WebSocketServer:
         
         logger.info(f"Connection {conn.connection_id} subscribed to {property_id}")
     
+    async def _handle_subscribe_batch(self, conn: Connection, message: Dict[str, Any]):
+        """Handle SUBSCRIBE_BATCH message (many properties in one frame)."""
+        if not conn.authenticated:
+            await conn.send_error('Authentication required')
+            return
+        
+        property_ids = message.get('property_ids')
+        if not property_ids:
+            await conn.send_error('Property IDs required')
+            return
+        
+        for property_id in property_ids:
+            error = self._wildcard_error(conn, property_id)
+            if error:
+                await conn.send_error(error)
+                return
+        
+        new_ids = set(property_ids).difference(conn.subscriptions)
+        if self._subscription_limit_reached(conn, len(new_ids)):
+            await conn.send_error('Subscription limit exceeded')
+            return
+        
+        if message.get('batch'):
+            conn.batch_updates = True
+        for property_id in new_ids:
+            self._add_subscription(conn, property_id)
+        
+        await conn.send_message({
+            'type': 'SUBSCRIBED',
+            'property_ids': property_ids,
+        })
+        
+        logger.info(f"Connection {conn.connection_id} subscribed to {len(property_ids)} properties")
+    
+    def _wildcard_error(self, conn: Connection, property_id: str) -> Optional[str]:
+        """Return why a wildcard subscription is refused, or None if allowed."""
+        if not property_id.endswith(SubscriptionTrie.WILDCARD):
+            return None
+        if conn.role not in self.WILDCARD_SUBSCRIBE_ROLES:
+            return 'Wildcard subscriptions not permitted'
+        if len(property_id) - 1 < self.MIN_WILDCARD_PREFIX:
+            return 'Wildcard prefix too short'
+        return None
+    
+    def _subscription_limit_reached(self, conn: Connection, new_count: int) -> bool:
+        """Check whether adding new_count subscriptions would exceed the per-connection cap."""
+        return len(conn.subscriptions) + new_count > self.MAX_SUBSCRIPTIONS_PER_CONNECTION
+    
+    def _add_subscription(self, conn: Connection, property_id: str):
+        """Register a connection's subscription to a property."""
+        conn.subscriptions.add(property_id)
+        if self.subscriptions.add(property_id, conn.connection_id):
+            SUBSCRIPTION_COUNT.inc()
+    
     async def _handle_unsubscribe(self, conn: Connection, message: Dict[str, Any]):
         """Handle UNSUBSCRIBE message."""
         property_id = message.get('property_id')
         if not property_id:
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Property ID required',
-            })
+            await conn.send_error('Property ID required')
             return
         
         # Remove subscription
         conn.subscriptions.discard(property_id)
         
-        if property_id in self.subscriptions:
-            self.subscriptions[property_id].discard(conn.connection_id)
-            if not self.subscriptions[property_id]:
-                del self.subscriptions[property_id]
-            SUBSCRIPTION_COUNT.labels(property_id=property_id).dec()
+        if self.subscriptions.discard(property_id, conn.connection_id):
+            SUBSCRIPTION_COUNT.dec()
         
         await conn.send_message({
             'type': 'UNSUBSCRIBED',
@@ -422,10 +942,19 @@ class WebSocketServer:
         
         await conn.send_message(status)
     
+    async def _handle_relay(self, conn: Connection, message: Dict[str, Any]):
+        """Handle RELAY message (a broadcast forwarded by an upstream server)."""
+        if not conn.is_relay:
+            await conn.send_error('Relay authentication required')
+            return
+        
+        await self.broadcast(message['property_id'], message['message'])
+    
     async def _handle_ping(self, conn: Connection, message: Dict[str, Any]):
         """Handle PING message."""
         conn.last_ping = time.time()
-        await conn.send_message({'type': 'PONG'})
+        if await conn.send_raw(PONG_FRAMES[conn.encoding]):
+            OUTBOUND_MESSAGES['PONG'].inc()
     
     async def _handle_message(self, conn: Connection, raw_message: str):
         """
@@ -435,12 +964,19 @@ class WebSocketServer:
             conn: Connection instance
             raw_message: Raw message string
         """
-        start_time = time.time()
+        # One monotonic reading serves the rate limiter and the latency metric
+        start_time = time.monotonic()
         
         try:
             # Parse message
-            message = json.loads(raw_message)
-            MESSAGES_TOTAL.labels(type=message.get('type', 'unknown'), direction='inbound').inc()
+            message = decode_message(raw_message, conn.encoding)
+            if not isinstance(message, dict):
+                raise MessageValidationError("Invalid message format")
+            # Client-supplied types are only used as labels once known valid
+            inbound_type = message.get('type')
+            if not isinstance(inbound_type, str) or inbound_type not in self._handlers:
+                inbound_type = 'unknown'
+            INBOUND_MESSAGES[inbound_type].inc()
             
             # Validate message
             if not self._validate_message(message):
@@ -449,55 +985,35 @@ class WebSocketServer:
             # Sanitize message
             message = self._sanitize_message(message)
             
-            # Check rate limit
-            if not conn.rate_limiter.check_rate_limit():
+            # Check rate limit (relay peers carry many clients' traffic).
+            # A SUBSCRIBE_BATCH costs one token like any other frame; the
+            # subscriptions it can add are bounded per connection instead
+            message_type = message['type']
+            if not conn.is_relay and not conn.rate_limiter.check_rate_limit(start_time):
                 raise RateLimitError("Rate limit exceeded")
             
             # Route message to handler
-            message_type = message['type']
-            
-            if message_type == 'AUTHENTICATE':
-                await self._handle_authenticate(conn, message)
-            elif message_type == 'SUBSCRIBE':
-                await self._handle_subscribe(conn, message)
-            elif message_type == 'UNSUBSCRIBE':
-                await self._handle_unsubscribe(conn, message)
-            elif message_type == 'GET_STATUS':
-                await self._handle_get_status(conn, message)
-            elif message_type == 'PING':
-                await self._handle_ping(conn, message)
+            await self._handlers[message_type](conn, message)
             
             # Record latency
-            duration = time.time() - start_time
-            MESSAGE_LATENCY.labels(type=message_type).observe(duration)
+            duration = time.monotonic() - start_time
+            MESSAGE_LATENCY_BY_TYPE[message_type].observe(duration)
         
         except json.JSONDecodeError:
             logger.warning(f"Invalid JSON from {conn.connection_id}")
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Invalid JSON',
-            })
+            await conn.send_error('Invalid JSON')
         
         except MessageValidationError as e:
             logger.warning(f"Message validation failed from {conn.connection_id}: {e}")
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': str(e),
-            })
+            await conn.send_error(str(e))
         
         except RateLimitError as e:
             logger.warning(f"Rate limit exceeded for {conn.connection_id}")
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Rate limit exceeded',
-            })
+            await conn.send_error('Rate limit exceeded')
         
         except Exception as e:
             logger.error(f"Error handling message from {conn.connection_id}: {e}", exc_info=True)
-            await conn.send_message({
-                'type': 'ERROR',
-                'message': 'Internal server error',
-            })
+            await conn.send_error('Internal server error')
     
     async def _connection_handler(self, websocket: WebSocketServerProtocol, path: str):
         """
@@ -511,18 +1027,19 @@ class WebSocketServer:
         if len(self.connections) >= self.max_connections:
             logger.warning(f"Connection limit reached: {len(self.connections)}")
             await websocket.close(1008, "Server at capacity")
-            CONNECTIONS_TOTAL.labels(status='rejected').inc()
+            CONNECTIONS_REJECTED.inc()
             return
         
         # Create connection
-        connection_id = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}:{time.time()}"
-        conn = Connection(websocket, connection_id)
+        connection_id = next(self._connection_ids)
+        remote_addr = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+        conn = Connection(websocket, connection_id, remote_addr=remote_addr)
         self.connections[connection_id] = conn
         
-        CONNECTIONS_TOTAL.labels(status='accepted').inc()
+        CONNECTIONS_ACCEPTED.inc()
         ACTIVE_CONNECTIONS.inc()
         
-        logger.info(f"New connection: {connection_id}")
+        logger.info(f"New connection: {connection_id} from {remote_addr}")
         
         try:
             # Send welcome message
@@ -534,7 +1051,8 @@ class WebSocketServer:
             
             # Handle messages
             async for message in websocket:
-                await self._handle_message(conn, message)
+                async with self._handler_semaphore:
+                    await self._handle_message(conn, message)
         
         except websockets.exceptions.ConnectionClosed:
             logger.info(f"Connection closed: {connection_id}")
@@ -546,78 +1064,166 @@ class WebSocketServer:
             # Cleanup connection
             await self._cleanup_connection(connection_id)
     
-    async def _cleanup_connection(self, connection_id: str):
+    async def _cleanup_connection(self, connection_id: int):
         """
         Clean up connection resources.
         
         Args:
             connection_id: Connection identifier
         """
-        if connection_id not in self.connections:
+        # Remove connection
+        conn = self.connections.pop(connection_id, None)
+        if conn is None:
             return
-        
-        conn = self.connections[connection_id]
+        conn.cancel_pending()
+        ACTIVE_CONNECTIONS.dec()
+        if conn.authenticated:
+            self.authenticated_count -= 1
         
         # Remove all subscriptions
-        for property_id in list(conn.subscriptions):
-            if property_id in self.subscriptions:
-                self.subscriptions[property_id].discard(connection_id)
-                if not self.subscriptions[property_id]:
-                    del self.subscriptions[property_id]
-                SUBSCRIPTION_COUNT.labels(property_id=property_id).dec()
-        
-        # Remove connection
-        del self.connections[connection_id]
-        ACTIVE_CONNECTIONS.dec()
+        for property_id in conn.subscriptions:
+            if self.subscriptions.discard(property_id, connection_id):
+                SUBSCRIPTION_COUNT.dec()
         
         logger.info(f"Connection cleaned up: {connection_id}")
     
-    async def _heartbeat_loop(self):
-        """Send periodic heartbeat pings to all connections."""
-        while self.running:
-            try:
-                await asyncio.sleep(self.heartbeat_interval)
-                
-                # Send ping to all connections
-                for conn_id, conn in list(self.connections.items()):
-                    try:
-                        await conn.send_message({'type': 'PING'})
-                    except Exception as e:
-                        logger.warning(f"Failed to send heartbeat to {conn_id}: {e}")
-                
-                logger.debug(f"Heartbeat sent to {len(self.connections)} connections")
-            
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in heartbeat loop: {e}", exc_info=True)
-    
     async def broadcast(self, property_id: str, message: Dict[str, Any]):
         """
         Broadcast message to all subscribers of a property.
         
+        Connections subscribed to a wildcard prefix of the property id
+        receive it too. Connections in batch mode receive it in their
+        next array frame. The message is also forwarded to every relay
+        peer, which broadcasts it to its own subscribers; that happens in a
+        background task so a slow peer never delays local subscribers.
+        
         Args:
             property_id: Property identifier
             message: Message to broadcast
         """
-        if property_id not in self.subscriptions:
-            return
+        if self._relay_links:
+            task = asyncio.create_task(self._relay(property_id, message))
+            self._relay_sends.add(task)
+            task.add_done_callback(self._relay_sends.discard)
         
-        subscribers = self.subscriptions[property_id].copy()
+        subscribers = self.subscriptions.match(property_id)
+        if not subscribers:
+            return
         
+        # Serialize once per encoding instead of once per send
+        payloads = {}
+        connections = self.connections
+        targets = []
+        sent = 0
+        # Batch-mode connections buffer the frame; the rest are sent now
         for conn_id in subscribers:
-            if conn_id not in self.connections:
+            conn = connections.get(conn_id)
+            if conn is None:
                 continue
-            
-            conn = self.connections[conn_id]
-            success = await conn.send_message(message)
-            
+            if conn.encoding in payloads:
+                payload = payloads[conn.encoding]
+            else:
+                payload = payloads[conn.encoding] = self._encode_broadcast(message, conn.encoding)
+            if payload is None:
+                continue  # Not representable in this connection's encoding
+            if conn.batch_updates:
+                conn.queue_broadcast(payload, message)
+                sent += 1
+            else:
+                targets.append((conn, payload))
+        
+        # Send concurrently so one slow client does not delay the rest
+        results = await asyncio.gather(
+            *(conn.send_raw(payload) for conn, payload in targets),
+            return_exceptions=True,
+        )
+        
+        for (conn, _), result in zip(targets, results, strict=True):
             # Queue message if send failed
-            if not success:
+            if result is True:
+                sent += 1
+            else:
                 conn.add_to_queue(message)
         
+        OUTBOUND_MESSAGES[message.get('type', 'unknown')].inc(sent)
+        
         logger.debug(f"Broadcast to {len(subscribers)} subscribers of {property_id}")
     
+    @staticmethod
+    def _encode_broadcast(message: Dict[str, Any], encoding: str) -> Optional[Union[str, bytes]]:
+        """
+        Serialize a broadcast, or return None if the encoding cannot represent it.
+        
+        A payload one encoding rejects (a set, or a datetime for MessagePack)
+        is logged and skipped for that encoding instead of failing the
+        whole broadcast.
+        """
+        try:
+            return encode_message(message, encoding)
+        except (TypeError, ValueError, OverflowError) as e:
+            logger.error(f"Cannot encode {message.get('type', 'unknown')} broadcast as {encoding}: {e}")
+            return None
+    
+    async def _relay(self, property_id: str, message: Dict[str, Any]):
+        """Forward a broadcast to all connected relay peers."""
+        frame = self._encode_broadcast({
+            'type': 'RELAY',
+            'property_id': property_id,
+            'message': message,
+        }, 'json')
+        if frame is None:
+            return
+        links = list(self._relay_links.items())
+        results = await asyncio.gather(
+            *(asyncio.wait_for(link.send(frame), self.RELAY_SEND_TIMEOUT) for _, link in links),
+            return_exceptions=True,
+        )
+        sent = 0
+        for (url, _), result in zip(links, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to relay to {url}: {result!r}")
+            else:
+                sent += 1
+        OUTBOUND_MESSAGES['RELAY'].inc(sent)
+    
+    async def _relay_link_loop(self, url: str):
+        """
+        Keep an authenticated connection open to a relay peer.
+        
+        Args:
+            url: Peer server URL
+        """
+        delay = 1
+        while self.running:
+            try:
+                async with websockets.connect(url, ping_interval=self.heartbeat_interval) as link:
+                    await link.send(encode_message({'type': 'AUTHENTICATE', 'token': self.relay_token}))
+                    
+                    # Peers only reply with WELCOME/AUTHENTICATED, or ERROR on failure;
+                    # broadcasts are relayed only once the peer has accepted the token
+                    async for raw_message in link:
+                        reply = decode_message(raw_message)
+                        if not isinstance(reply, dict):
+                            continue
+                        if reply.get('type') == 'AUTHENTICATED' and url not in self._relay_links:
+                            self._relay_links[url] = link
+                            delay = 1
+                            logger.info(f"Relay link to {url} established")
+                        elif reply.get('type') == 'ERROR':
+                            logger.warning(f"Relay peer {url} error: {reply.get('message')}")
+                            if url not in self._relay_links:
+                                break  # Authentication rejected; retry after backoff
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Relay link to {url} failed: {e}")
+            finally:
+                self._relay_links.pop(url, None)
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RELAY_BACKOFF)
+    
     async def start(self):
         """Start the WebSocket server."""
         if not WEBSOCKETS_AVAILABLE:
@@ -631,12 +1237,17 @@ class WebSocketServer:
             self.host,
             self.port,
             max_size=10 * 1024 * 1024,  # 10MB max message size
-            max_queue=1000,
-            ping_interval=None,  # We handle pings manually
+            max_queue=64,  # Apply backpressure to clients that flood the server
+            # Keepalive uses RFC 6455 ping control frames, which clients
+            # answer at the protocol layer; unanswered pings close the connection
+            ping_interval=self.heartbeat_interval,
+            ping_timeout=self.heartbeat_interval,
         )
         
-        # Start heartbeat loop
-        self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        # Connect to relay peers
+        self._relay_tasks = [
+            asyncio.create_task(self._relay_link_loop(url)) for url in self.relay_peers
+        ]
         
         logger.info(f"WebSocket server started on {self.host}:{self.port}")
     
@@ -646,17 +1257,15 @@ class WebSocketServer:
         
         self.running = False
         
-        # Cancel heartbeat
-        if self.heartbeat_task:
-            self.heartbeat_task.cancel()
-            try:
-                await self.heartbeat_task
-            except asyncio.CancelledError:
-                pass
+        # Disconnect from relay peers
+        relay_tasks = [*self._relay_tasks, *self._relay_sends]
+        for task in relay_tasks:
+            task.cancel()
+        await asyncio.gather(*relay_tasks, return_exceptions=True)
+        self._relay_tasks = []
         
         # Close all connections
-        for conn_id in list(self.connections.keys()):
-            conn = self.connections[conn_id]
+        for conn_id, conn in list(self.connections.items()):
             try:
                 await conn.websocket.close()
             except Exception:
@@ -679,9 +1288,9 @@ class WebSocketServer:
         """
         return {
             'active_connections': len(self.connections),
-            'total_subscriptions': sum(len(subs) for subs in self.subscriptions.values()),
+            'total_subscriptions': self.subscriptions.subscription_count,
             'unique_properties': len(self.subscriptions),
-            'authenticated_connections': sum(1 for c in self.connections.values() if c.authenticated),
+            'authenticated_connections': self.authenticated_count,
             'running': self.running,
         }
     
@@ -696,30 +1305,31 @@ class WebSocketServer:
 
 
 # Admin endpoints helper functions
-async def get_connection_info(server: WebSocketServer, connection_id: str) -> Optional[Dict[str, Any]]:
+async def get_connection_info(server: WebSocketServer, connection_id: int) -> Optional[Dict[str, Any]]:
     """Get information about a specific connection."""
-    if connection_id not in server.connections:
+    conn = server.connections.get(connection_id)
+    if conn is None:
         return None
     
-    conn = server.connections[connection_id]
     return {
         'connection_id': conn.connection_id,
+        'remote_addr': conn.remote_addr,
         'authenticated': conn.authenticated,
         'user_id': conn.user_id,
         'subscriptions': list(conn.subscriptions),
         'connected_at': conn.connected_at,
         'uptime': time.time() - conn.connected_at,
         'last_ping': conn.last_ping,
-        'message_queue_size': len(conn.message_queue),
+        'message_queue_size': len(conn.message_queue) if conn.message_queue else 0,
     }
 
 
-async def disconnect_connection(server: WebSocketServer, connection_id: str) -> bool:
+async def disconnect_connection(server: WebSocketServer, connection_id: int) -> bool:
     """Forcefully disconnect a connection."""
-    if connection_id not in server.connections:
+    conn = server.connections.get(connection_id)
+    if conn is None:
         return False
     
-    conn = server.connections[connection_id]
     try:
         await conn.websocket.close(1000, "Disconnected by admin")
         await server._cleanup_connection(connection_id)
@@ -765,4 +1375,7 @@ if __name__ == "__main__":
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    asyncio.run(main())
+    # uvloop's libuv-based event loop when installed, stock asyncio otherwise
+    loop_factory = uvloop.new_event_loop if UVLOOP_AVAILABLE else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
@@ -3,13 +3,15 @@ Risk Engine Module for ViolationSentinel
 Competitive moat features for NYC property violation prediction
 """
 
-from .pre1974_multiplier import pre1974_risk_multiplier, get_building_era_risk
+from .pre1974_multiplier import pre1974_risk_multiplier, pre1974_risk_multiplier_array, get_building_era_risk
 from .inspector_patterns import inspector_risk_multiplier, get_district_hotspot
 from .seasonal_heat_model import heat_violation_forecast, is_heat_season
 from .peer_benchmark import peer_percentile, get_similar_properties
+from .portfolio_scoring import score_portfolio_vectorized
 
 __all__ = [
     'pre1974_risk_multiplier',
+    'pre1974_risk_multiplier_array',
     'get_building_era_risk',
     'inspector_risk_multiplier',
     'get_district_hotspot',
@@ -17,4 +19,5 @@ __all__ = [
     'is_heat_season',
     'peer_percentile',
     'get_similar_properties',
+    'score_portfolio_vectorized',
 ]
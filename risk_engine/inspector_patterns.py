@@ -7,7 +7,10 @@ Competitors can't replicate this without deep NYC Open Data analysis.
 Source: HPD violation response patterns + 311 geographic clustering
 """
 
-from typing import Dict, Optional
+import sys
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 
 # Inspector hotspot multipliers based on HPD complaint response patterns
@@ -45,6 +48,14 @@ BOROUGH_BASELINES = {
     'staten_island': 0.9,
 }
 
+# Borough names indexed by the BBL borough digit (1-5)
+_BOROUGHS_BY_CODE = (None, 'manhattan', 'bronx', 'brooklyn', 'queens', 'staten_island')
+
+
+def _lower_key(value: str) -> str:
+    """Lowercase a lookup key, skipping the copy when it already is lowercase."""
+    return value if value.islower() else value.lower()
+
 
 def inspector_risk_multiplier(bbl: str, council_district: Optional[str] = None) -> float:
     """
@@ -70,8 +81,10 @@ def inspector_risk_multiplier(bbl: str, council_district: Optional[str] = None)
         1.2
     """
     # If district provided and in hotspot list, use hotspot value
-    if council_district and council_district.lower() in INSPECTOR_HOTSPOTS:
-        return INSPECTOR_HOTSPOTS[council_district.lower()]
+    if council_district:
+        multiplier = INSPECTOR_HOTSPOTS.get(_lower_key(council_district))
+        if multiplier is not None:
+            return multiplier
     
     # Fall back to borough baseline from BBL
     borough = get_borough_from_bbl(bbl)
@@ -88,7 +101,15 @@ def get_district_hotspot(council_district: str) -> Dict:
     Returns:
         Dictionary with hotspot details
     """
-    district_key = council_district.lower()
+    # Copy so callers cannot modify the cached entry
+    hotspot = _district_hotspot(council_district)
+    return {**hotspot, 'action_items': list(hotspot['action_items'])}
+
+
+@lru_cache(maxsize=256)
+def _district_hotspot(council_district: str) -> Dict:
+    """Hotspot details for a district, cached; action_items is a tuple."""
+    district_key = _lower_key(council_district)
     multiplier = INSPECTOR_HOTSPOTS.get(district_key, 1.0)
     
     # Determine risk level based on multiplier
@@ -128,15 +149,8 @@ def get_borough_from_bbl(bbl: str) -> str:
     if not bbl or len(bbl) != 10:
         return 'unknown'
     
-    borough_map = {
-        '1': 'manhattan',
-        '2': 'bronx',
-        '3': 'brooklyn',
-        '4': 'queens',
-        '5': 'staten_island'
-    }
-    
-    return borough_map.get(bbl[0], 'unknown')
+    code = ord(bbl[0]) - 48  # ord('0')
+    return _BOROUGHS_BY_CODE[code] if 1 <= code <= 5 else 'unknown'
 
 
 def get_borough_baseline(borough: str) -> float:
@@ -149,31 +163,31 @@ def get_borough_baseline(borough: str) -> float:
     Returns:
         Baseline risk multiplier
     """
-    return BOROUGH_BASELINES.get(borough.lower(), 1.0)
+    return BOROUGH_BASELINES.get(_lower_key(borough), 1.0)
 
 
-def _get_hotspot_actions(multiplier: float) -> list:
+def _get_hotspot_actions(multiplier: float) -> Tuple[str, ...]:
     """Get recommended actions based on hotspot multiplier."""
     if multiplier >= 2.0:
-        return [
+        return (
             'URGENT: Proactive compliance review recommended',
             'Expect faster 311 complaint → HPD inspection conversion',
             'Consider preventive maintenance acceleration',
             'HPD response time: 7-14 days (vs. 30+ days citywide)',
             'High probability of follow-up inspections'
-        ]
+        )
     elif multiplier >= 1.5:
-        return [
+        return (
             'Elevated inspector presence in area',
             'Monitor 311 complaints closely',
             'Standard maintenance schedule recommended',
             'HPD response time: 14-21 days'
-        ]
+        )
     else:
-        return [
+        return (
             'Standard enforcement patterns',
             'Regular maintenance schedule sufficient'
-        ]
+        )
 
 
 def calculate_combined_inspector_risk(buildings: list) -> Dict:
@@ -196,11 +210,15 @@ def calculate_combined_inspector_risk(buildings: list) -> Dict:
     
     hotspot_count = 0
     total_multiplier = 0
-    district_counts = {}
+    districts = []
     
     for building in buildings:
         bbl = building.get('bbl', '')
         district = building.get('council_district')
+        if district:
+            # Portfolios repeat a handful of districts; share one string
+            # per district so hashes are cached across buildings
+            district = sys.intern(district)
         
         multiplier = inspector_risk_multiplier(bbl, district)
         total_multiplier += multiplier
@@ -209,15 +227,16 @@ def calculate_combined_inspector_risk(buildings: list) -> Dict:
             hotspot_count += 1
         
         if district:
-            district_counts[district] = district_counts.get(district, 0) + 1
+            districts.append(district)
     
     total = len(buildings)
     avg_multiplier = total_multiplier / total if total > 0 else 1.0
     
     # Find most common district (handle empty case)
+    district_counts = Counter(districts)
     highest_risk_district = None
     if district_counts:
-        highest_risk_district = max(district_counts.items(), key=lambda x: x[1])[0]
+        highest_risk_district = district_counts.most_common(1)[0][0]
     
     return {
         'total_buildings': total,
@@ -7,9 +7,20 @@ Anonymized benchmarking creates instant credibility and urgency.
 This feature converts leads by showing landlords where they stand vs. peers.
 """
 
-from typing import Dict, List, Optional
-import statistics
-import random  # For mock data generation in demonstration mode
+import math
+import numbers
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Random source for mock data generation in demonstration mode
+_rng = np.random.default_rng()
+
+# Peer action messages, formatted with the building's score
+_ACTION_ABOVE_AVERAGE = "Your score %.0f is %.0f points above neighborhood average. Immediate review recommended."
+_ACTION_MODERATE = "Your score %.0f is above average. Consider preventive measures."
+_ACTION_BELOW_AVERAGE = "Your score %.0f is below neighborhood average. Continue current maintenance."
 
 
 def peer_percentile(
@@ -39,21 +50,16 @@ def peer_percentile(
     # If no similar buildings provided, generate mock data for now
     # In production, this would query actual database of monitored properties
     if similar_buildings is None:
-        similar_buildings = _generate_similar_building_scores(building_data or {})
-    
-    if not similar_buildings:
-        return {
-            'address': address,
-            'risk_score': risk_score,
-            'vs_peers': 'Insufficient peer data',
-            'percentile': None,
-            'similar_count': 0
-        }
-    
-    # Calculate percentile
-    peer_scores = [b.get('risk_score', 50) for b in similar_buildings if 'risk_score' in b]
+        peer_stats = _cohort_peer_stats(_cohort_key(building_data or {}))
+        similar_count = peer_stats[0].size if peer_stats else 0
+    else:
+        peer_stats = _summarize_peer_scores(np.fromiter(
+            (b['risk_score'] for b in similar_buildings if 'risk_score' in b),
+            dtype=np.float64,
+        ))
+        similar_count = len(similar_buildings)
     
-    if not peer_scores:
+    if peer_stats is None:
         return {
             'address': address,
             'risk_score': risk_score,
@@ -62,13 +68,11 @@ def peer_percentile(
             'similar_count': 0
         }
     
-    # Percentile calculation
-    below_count = sum(1 for score in peer_scores if score < risk_score)
-    percentile = (below_count / len(peer_scores)) * 100
+    sorted_scores, neighborhood_avg, neighborhood_median = peer_stats
     
-    # Stats
-    neighborhood_avg = statistics.mean(peer_scores)
-    neighborhood_median = statistics.median(peer_scores)
+    # Percentile calculation: peers scoring strictly below this building
+    below_count = int(np.searchsorted(sorted_scores, risk_score, side='left'))
+    percentile = (below_count / sorted_scores.size) * 100
     
     # Determine comparison message
     if percentile >= 90:
@@ -98,7 +102,7 @@ def peer_percentile(
         'urgency': urgency,
         'neighborhood_avg': round(neighborhood_avg, 1),
         'neighborhood_median': round(neighborhood_median, 1),
-        'similar_count': len(similar_buildings),
+        'similar_count': similar_count,
         'match_criteria': match_criteria,
         'action': _get_peer_action(percentile, risk_score, neighborhood_avg)
     }
@@ -179,21 +183,29 @@ def calculate_portfolio_peer_ranking(portfolio: List[Dict], market_data: Optiona
             'portfolio_percentile': None
         }
     
-    # Calculate portfolio average risk
-    portfolio_scores = [b.get('risk_score', 50) for b in portfolio if 'risk_score' in b]
+    # Scored buildings feed both the average and the high-risk count;
+    # unscored buildings are never high risk
+    portfolio_scores = np.fromiter(
+        (b['risk_score'] for b in portfolio if 'risk_score' in b),
+        dtype=np.float64,
+    )
     
-    if not portfolio_scores:
+    # Calculate portfolio average risk
+    if not portfolio_scores.size:
         avg_risk = 50  # Default
     else:
-        avg_risk = statistics.mean(portfolio_scores)
+        avg_risk = float(portfolio_scores.mean())
     
     # Get market comparison
     if market_data:
-        market_scores = [b.get('risk_score', 50) for b in market_data if 'risk_score' in b]
-        if market_scores:
-            market_avg = statistics.mean(market_scores)
-            below_count = sum(1 for score in market_scores if score < avg_risk)
-            percentile = (below_count / len(market_scores)) * 100
+        market_scores = np.fromiter(
+            (b['risk_score'] for b in market_data if 'risk_score' in b),
+            dtype=np.float64,
+        )
+        if market_scores.size:
+            market_avg = float(market_scores.mean())
+            below_count = int((market_scores < avg_risk).sum())
+            percentile = (below_count / market_scores.size) * 100
         else:
             market_avg = 50
             percentile = None
@@ -202,7 +214,7 @@ def calculate_portfolio_peer_ranking(portfolio: List[Dict], market_data: Optiona
         percentile = None
     
     # High-risk building count
-    high_risk_count = sum(1 for b in portfolio if b.get('risk_score', 0) >= 70)
+    high_risk_count = int((portfolio_scores >= 70).sum())
     
     return {
         'portfolio_size': len(portfolio),
@@ -216,22 +228,76 @@ def calculate_portfolio_peer_ranking(portfolio: List[Dict], market_data: Optiona
     }
 
 
+def _bucket(value, size: int) -> Optional[int]:
+    """Integer bucket of a numeric value, or None if it is missing or not a number."""
+    try:
+        return int(value) // size if value else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _cohort_key(building_data: Dict) -> Tuple:
+    """
+    Bucket a building into a peer cohort: (borough, units // 10, decade built).
+    
+    Values that are missing or malformed (e.g. units 'N/A') leave their
+    part of the key as None.
+    """
+    borough = building_data.get('borough')
+    decade = _bucket(building_data.get('year_built'), 10)
+    return (
+        borough.lower() if isinstance(borough, str) and borough else None,
+        _bucket(building_data.get('units'), 10),
+        decade * 10 if decade is not None else None,
+    )
+
+
+def _summarize_peer_scores(scores: np.ndarray) -> Optional[Tuple[np.ndarray, float, float]]:
+    """
+    Sort peer scores and compute their mean and median.
+    
+    Returns None when there are no scores. The sorted array is read-only
+    because cohort summaries are cached and shared.
+    """
+    if not scores.size:
+        return None
+    sorted_scores = np.sort(scores)
+    sorted_scores.flags.writeable = False
+    return sorted_scores, float(sorted_scores.mean()), float(np.median(sorted_scores))
+
+
+@lru_cache(maxsize=1024)
+def _cohort_peer_stats(cohort_key: Tuple) -> Optional[Tuple[np.ndarray, float, float]]:
+    """
+    Peer score summary for a cohort, memoized so repeat lookups for the
+    same kind of building reuse one sample instead of regenerating it.
+    """
+    borough, units_bucket, decade = cohort_key
+    building_data = {
+        'borough': borough,
+        'units': units_bucket * 10 if units_bucket is not None else None,
+        'year_built': decade,
+    }
+    scores = _generate_similar_building_scores(
+        {key: value for key, value in building_data.items() if value is not None}
+    )
+    return _summarize_peer_scores(
+        np.fromiter((b['risk_score'] for b in scores), dtype=np.float64, count=len(scores))
+    )
+
+
 def _generate_similar_building_scores(building_data: Dict) -> List[Dict]:
     """
     Generate mock similar building scores for demonstration.
     In production, this queries actual database.
     """
     # Generate 50-200 similar buildings with realistic score distribution
-    count = random.randint(80, 200)
-    scores = []
+    count = int(_rng.integers(80, 200, endpoint=True))
     
-    # Normal distribution around 55 with some variance
-    for _ in range(count):
-        score = random.gauss(55, 18)
-        score = max(10, min(95, score))  # Clamp to 10-95
-        scores.append({'risk_score': score})
+    # Normal distribution around 55 with some variance, clamped to 10-95
+    scores = np.clip(_rng.normal(55, 18, size=count), 10, 95)
     
-    return scores
+    return [{'risk_score': score} for score in scores.tolist()]
 
 
 def _generate_similar_buildings(building_data: Dict) -> List[Dict]:
@@ -240,27 +306,27 @@ def _generate_similar_buildings(building_data: Dict) -> List[Dict]:
     base_year = building_data.get('year_built', 1965)
     borough = building_data.get('borough', 'Brooklyn')
     
-    count = random.randint(80, 200)
-    similar = []
+    count = int(_rng.integers(80, 200, endpoint=True))
     
-    for i in range(count):
-        # Vary units by ±25%
-        units = int(base_units * random.uniform(0.75, 1.25))
-        # Vary year by ±12 years
-        year = base_year + random.randint(-12, 12)
-        # Risk score with some correlation to year
-        base_risk = 70 if year < 1960 else 60 if year < 1974 else 45
-        risk_score = base_risk + random.gauss(0, 12)
-        risk_score = max(10, min(95, risk_score))
-        
-        similar.append({
-            'units': units,
+    # Vary units by ±25%
+    units = (base_units * _rng.uniform(0.75, 1.25, size=count)).astype(np.int64)
+    # Vary year by ±12 years
+    years = base_year + _rng.integers(-12, 12, size=count, endpoint=True)
+    # Risk score with some correlation to year
+    base_risk = np.where(years < 1960, 70, np.where(years < 1974, 60, 45))
+    risk_scores = np.clip(base_risk + _rng.normal(0, 12, size=count), 10, 95)
+    
+    return [
+        {
+            'units': building_units,
             'year_built': year,
             'borough': borough,
             'risk_score': risk_score
-        })
-    
-    return similar
+        }
+        for building_units, year, risk_score in zip(
+            units.tolist(), years.tolist(), risk_scores.tolist(), strict=True
+        )
+    ]
 
 
 def _get_match_criteria(building_data: Dict) -> str:
@@ -270,26 +336,31 @@ def _get_match_criteria(building_data: Dict) -> str:
     if 'borough' in building_data:
         criteria.append(f"{building_data['borough']} properties")
     
-    if 'units' in building_data:
-        units = building_data['units']
+    # Non-numeric units/years (e.g. 'N/A' or NaN) are left out of the description
+    units = building_data.get('units')
+    if _is_number(units):
         criteria.append(f"{int(units*0.7)}-{int(units*1.3)} units")
     
-    if 'year_built' in building_data:
-        year = building_data['year_built']
+    year = building_data.get('year_built')
+    if _is_number(year):
         criteria.append(f"built {year-15} to {year+15}")
     
     return "Matched on: " + ", ".join(criteria) if criteria else "General market comparison"
 
 
+def _is_number(value) -> bool:
+    """Finite real number, including numpy scalars but not bools."""
+    return isinstance(value, numbers.Real) and not isinstance(value, bool) and math.isfinite(value)
+
+
 def _get_peer_action(percentile: float, risk_score: float, avg_score: float) -> str:
     """Get action item based on peer comparison."""
     if percentile >= 75:
-        diff = risk_score - avg_score
-        return f"Your score {risk_score:.0f} is {diff:.0f} points above neighborhood average. Immediate review recommended."
+        return _ACTION_ABOVE_AVERAGE % (risk_score, risk_score - avg_score)
     elif percentile >= 50:
-        return f"Your score {risk_score:.0f} is above average. Consider preventive measures."
+        return _ACTION_MODERATE % risk_score
     else:
-        return f"Your score {risk_score:.0f} is below neighborhood average. Continue current maintenance."
+        return _ACTION_BELOW_AVERAGE % risk_score
 
 
 def _get_portfolio_recommendation(avg_risk: float, high_risk_count: int, total: int) -> str:
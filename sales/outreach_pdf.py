@@ -37,10 +37,19 @@ def generate_outreach_pdf(
         >>> with open('risk_alert.pdf', 'wb') as f:
         >>>     f.write(pdf_data['content'])
     """
-    # Calculate high-risk buildings
-    high_risk = [b for b in portfolio_data if b.get('risk_score', 0) >= 70]
-    pre1974 = [b for b in portfolio_data if b.get('year_built', 2000) < 1974]
-    pre1960 = [b for b in portfolio_data if b.get('year_built', 2000) < 1960]
+    # Calculate high-risk buildings in a single pass over the portfolio
+    high_risk = []
+    pre1974 = []
+    pre1960 = []
+    for building in portfolio_data:
+        if building.get('risk_score', 0) >= 70:
+            high_risk.append(building)
+        
+        year_built = building.get('year_built', 2000)
+        if year_built < 1974:
+            pre1974.append(building)
+            if year_built < 1960:
+                pre1960.append(building)
     
     # Generate text content (in production, use reportlab for actual PDF)
     content = _generate_pdf_text_content(
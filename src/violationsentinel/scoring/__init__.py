@@ -6,6 +6,7 @@ Core competitive moat features for violation risk assessment.
 
 from .pre1974_multiplier import (
     pre1974_risk_multiplier,
+    pre1974_risk_multiplier_array,
     get_building_era_risk,
     calculate_portfolio_pre1974_stats,
     is_pre1974_building,
@@ -25,10 +26,12 @@ from .peer_benchmark import (
     get_similar_properties,
     calculate_portfolio_peer_ranking,
 )
+from .portfolio_scoring import score_portfolio_vectorized
 
 __all__ = [
     # Pre-1974 risk
     "pre1974_risk_multiplier",
+    "pre1974_risk_multiplier_array",
     "get_building_era_risk",
     "calculate_portfolio_pre1974_stats",
     "is_pre1974_building",
@@ -44,4 +47,6 @@ __all__ = [
     "peer_percentile",
     "get_similar_properties",
     "calculate_portfolio_peer_ranking",
+    # Bulk portfolio scoring
+    "score_portfolio_vectorized",
 ]
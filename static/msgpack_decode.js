@@ -0,0 +1,89 @@
+// Minimal MessagePack decoder for the binary frames sent by the monitoring
+// WebSocket server. Served from static/ with the other dashboard scripts so
+// no third-party code is loaded into the page. Extension types are not used
+// by the server and are rejected; 64-bit integers are returned as Numbers.
+
+window.MessagePack = (function() {
+    const textDecoder = new TextDecoder('utf-8');
+
+    function decode(bytes) {
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let offset = 0;
+
+        function readString(length) {
+            const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+            offset += length;
+            return value;
+        }
+
+        function readBinary(length) {
+            const value = bytes.slice(offset, offset + length);
+            offset += length;
+            return value;
+        }
+
+        function readArray(length) {
+            const value = new Array(length);
+            for (let i = 0; i < length; i++) {
+                value[i] = readValue();
+            }
+            return value;
+        }
+
+        function readMap(length) {
+            const value = {};
+            for (let i = 0; i < length; i++) {
+                const key = readValue();
+                value[key] = readValue();
+            }
+            return value;
+        }
+
+        function readValue() {
+            if (offset >= bytes.byteLength) {
+                throw new Error('MessagePack: unexpected end of data');
+            }
+            const type = view.getUint8(offset++);
+            let value;
+
+            // Fixed-size formats carry their value or length in the type byte
+            if (type <= 0x7f) return type;
+            if (type >= 0xe0) return type - 0x100;
+            if (type >= 0xa0 && type <= 0xbf) return readString(type & 0x1f);
+            if (type >= 0x90 && type <= 0x9f) return readArray(type & 0x0f);
+            if (type >= 0x80 && type <= 0x8f) return readMap(type & 0x0f);
+
+            switch (type) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: value = view.getUint8(offset); offset += 1; return readBinary(value);
+                case 0xc5: value = view.getUint16(offset); offset += 2; return readBinary(value);
+                case 0xc6: value = view.getUint32(offset); offset += 4; return readBinary(value);
+                case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+                case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+                case 0xcc: value = view.getUint8(offset); offset += 1; return value;
+                case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+                case 0xce: value = view.getUint32(offset); offset += 4; return value;
+                case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+                case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+                case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+                case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+                case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+                case 0xd9: value = view.getUint8(offset); offset += 1; return readString(value);
+                case 0xda: value = view.getUint16(offset); offset += 2; return readString(value);
+                case 0xdb: value = view.getUint32(offset); offset += 4; return readString(value);
+                case 0xdc: value = view.getUint16(offset); offset += 2; return readArray(value);
+                case 0xdd: value = view.getUint32(offset); offset += 4; return readArray(value);
+                case 0xde: value = view.getUint16(offset); offset += 2; return readMap(value);
+                case 0xdf: value = view.getUint32(offset); offset += 4; return readMap(value);
+                default:
+                    throw new Error('MessagePack: unsupported type 0x' + type.toString(16));
+            }
+        }
+
+        return readValue();
+    }
+
+    return {decode: decode};
+})();
@@ -0,0 +1,272 @@
+// Real-time violation updates for the landlord dashboard.
+// Loaded by landlord_dashboard.py after it sets window.VS_CONFIG.
+
+let ws = null;
+let reconnectAttempts = 0;
+const maxReconnectAttempts = 10;
+const baseDelay = 200;
+const maxDelay = 30000;
+// MessagePack decoder is loaded ahead of this script; fall back to JSON without it
+const msgpackAvailable = typeof MessagePack !== 'undefined';
+const updateFlushDelay = 250;
+const maxPendingUpdates = 500;
+let pendingUpdates = [];
+let flushTimer = null;
+let droppedUpdates = 0;
+// Client heartbeat; the connection is treated as dead after two silent intervals
+const heartbeatInterval = 20000;
+let heartbeatTimer = null;
+let lastMessageAt = 0;
+
+function getConnectionStatus() {
+    if (!ws) return 'disconnected';
+    switch(ws.readyState) {
+        case WebSocket.CONNECTING: return 'connecting';
+        case WebSocket.OPEN: return 'connected';
+        case WebSocket.CLOSING: return 'disconnecting';
+        case WebSocket.CLOSED: return 'disconnected';
+        default: return 'disconnected';
+    }
+}
+
+function updateConnectionUI(status) {
+    const statusElement = document.getElementById('ws-status');
+    if (!statusElement) return;
+    
+    let statusClass, dotClass, statusText;
+    
+    switch(status) {
+        case 'connected':
+            statusClass = 'status-connected';
+            dotClass = 'dot-green';
+            statusText = 'Connected';
+            break;
+        case 'connecting':
+        case 'reconnecting':
+            statusClass = 'status-reconnecting';
+            dotClass = 'dot-yellow';
+            statusText = status === 'reconnecting' ? 'Reconnecting...' : 'Connecting...';
+            break;
+        default:
+            statusClass = 'status-disconnected';
+            dotClass = 'dot-red';
+            statusText = 'Disconnected';
+    }
+    
+    statusElement.className = 'connection-status ' + statusClass;
+    if (droppedUpdates > 0) {
+        statusText += ' (' + droppedUpdates + ' updates dropped)';
+    }
+    
+    statusElement.innerHTML = '<span class="status-dot ' + dotClass + '"></span>' + statusText;
+}
+
+function connectWebSocket() {
+    // Per-page settings are written by the dashboard into window.VS_CONFIG
+    const wsUrl = window.VS_CONFIG.wsUrl;
+    const jwtToken = window.VS_CONFIG.jwtToken;
+    const properties = window.VS_CONFIG.properties;
+    const debugMode = window.VS_CONFIG.debugMode;
+    
+    try {
+        updateConnectionUI('connecting');
+        ws = new WebSocket(wsUrl);
+        // Binary frames carry MessagePack-encoded updates
+        ws.binaryType = 'arraybuffer';
+        
+        ws.onopen = function() {
+            console.log('WebSocket connected');
+            updateConnectionUI('connected');
+            reconnectAttempts = 0;
+            lastMessageAt = Date.now();
+            heartbeatTimer = setInterval(sendHeartbeat, heartbeatInterval);
+            
+            // Authenticate
+            if (jwtToken) {
+                ws.send(JSON.stringify({
+                    type: 'AUTHENTICATE',
+                    token: jwtToken,
+                    encoding: msgpackAvailable ? 'msgpack' : 'json'
+                }));
+            }
+            
+            // Subscribe to all properties in a single frame
+            if (properties.length) {
+                // batch: updates arrive coalesced into array frames
+                ws.send(JSON.stringify({
+                    type: 'SUBSCRIBE_BATCH',
+                    property_ids: properties,
+                    batch: true
+                }));
+                if (debugMode) {
+                    console.log('Subscribed to properties:', properties);
+                }
+            }
+        };
+        
+        ws.onmessage = function(event) {
+            lastMessageAt = Date.now();
+            const decoded = typeof event.data === 'string'
+                ? JSON.parse(event.data)
+                : MessagePack.decode(new Uint8Array(event.data));
+            
+            if (debugMode) {
+                console.log('WebSocket message:', decoded);
+            }
+            
+            // Batched broadcasts arrive as an array of messages
+            const messages = Array.isArray(decoded) ? decoded : [decoded];
+            messages.forEach(function(message) {
+                // Handle different message types
+                if (message.type === 'VIOLATION_UPDATE') {
+                    handleViolationUpdate(message);
+                }
+            });
+        };
+        
+        ws.onerror = function(error) {
+            console.error('WebSocket error:', error);
+            updateConnectionUI('disconnected');
+        };
+        
+        ws.onclose = function() {
+            console.log('WebSocket closed');
+            clearInterval(heartbeatTimer);
+            updateConnectionUI('disconnected');
+            attemptReconnect();
+        };
+        
+    } catch (error) {
+        console.error('Failed to create WebSocket:', error);
+        updateConnectionUI('disconnected');
+        attemptReconnect();
+    }
+}
+
+function sendHeartbeat() {
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+    
+    // Nothing heard for two intervals: assume a half-open connection
+    if (Date.now() - lastMessageAt > 2 * heartbeatInterval) {
+        console.log('WebSocket heartbeat timed out');
+        ws.close();
+        return;
+    }
+    
+    ws.send(JSON.stringify({type: 'PING'}));
+}
+
+function attemptReconnect() {
+    if (reconnectAttempts >= maxReconnectAttempts) {
+        console.log('Max reconnect attempts reached');
+        return;
+    }
+    
+    reconnectAttempts++;
+    // Exponential backoff capped at 30s; the random half spreads out
+    // reconnects when many dashboards lose the server at once
+    const backoff = Math.min(baseDelay * (1 << reconnectAttempts), maxDelay);
+    const delay = Math.round(backoff / 2 + Math.random() * backoff / 2);
+    
+    updateConnectionUI('reconnecting');
+    console.log('Reconnecting in', delay, 'ms (attempt', reconnectAttempts, ')');
+    
+    setTimeout(connectWebSocket, delay);
+}
+
+function handleViolationUpdate(message) {
+    // Show toast notification
+    showToast(message);
+    
+    // Queue the update; bursts are forwarded to Streamlit together
+    if (pendingUpdates.length >= maxPendingUpdates) {
+        // Evict the oldest non-critical update (or the oldest if all are critical)
+        const index = pendingUpdates.findIndex(function(update) {
+            return update.severity !== 'critical';
+        });
+        pendingUpdates.splice(index === -1 ? 0 : index, 1);
+        droppedUpdates++;
+        updateConnectionUI(getConnectionStatus());
+    }
+    pendingUpdates.push(message);
+    if (!flushTimer) {
+        flushTimer = setTimeout(flushUpdates, updateFlushDelay);
+    }
+}
+
+function flushUpdates() {
+    const updates = pendingUpdates;
+    pendingUpdates = [];
+    flushTimer = null;
+    
+    // Play sound once per batch if any violation is critical
+    if (updates.some(function(update) { return update.severity === 'critical'; })) {
+        playAlertSound();
+    }
+    
+    // Trigger a single Streamlit rerun for the whole batch
+    if (window.parent && window.parent.postMessage) {
+        window.parent.postMessage({
+            type: 'streamlit:setComponentValue',
+            value: {
+                updates: updates,
+                timestamp: new Date().toISOString()
+            }
+        }, '*');
+    }
+}
+
+function showToast(message) {
+    const toast = document.createElement('div');
+    toast.className = 'toast-notification' + (message.severity === 'critical' ? ' critical' : '');
+    toast.innerHTML = `
+        <strong>${message.property_id}</strong><br>
+        ${message.type}: ${message.count || 0} violations
+    `;
+    
+    document.body.appendChild(toast);
+    
+    setTimeout(function() {
+        toast.style.animation = 'slideInRight 0.3s ease-out reverse';
+        setTimeout(function() {
+            document.body.removeChild(toast);
+        }, 300);
+    }, 5000);
+}
+
+function playAlertSound() {
+    // Create a simple beep using Web Audio API
+    try {
+        const audioContext = new (window.AudioContext || window.webkitAudioContext)();
+        const oscillator = audioContext.createOscillator();
+        const gainNode = audioContext.createGain();
+        
+        oscillator.connect(gainNode);
+        gainNode.connect(audioContext.destination);
+        
+        oscillator.frequency.value = 800;
+        oscillator.type = 'sine';
+        
+        gainNode.gain.setValueAtTime(0.3, audioContext.currentTime);
+        gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.5);
+        
+        oscillator.start(audioContext.currentTime);
+        oscillator.stop(audioContext.currentTime + 0.5);
+    } catch (error) {
+        console.error('Failed to play alert sound:', error);
+    }
+}
+
+// Initialize WebSocket on page load
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', connectWebSocket);
+} else {
+    connectWebSocket();
+}
+
+// Cleanup on page unload
+window.addEventListener('beforeunload', function() {
+    if (ws && ws.readyState === WebSocket.OPEN) {
+        ws.close();
+    }
+});
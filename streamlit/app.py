@@ -9,8 +9,11 @@ BBL input → $27k fine exposure + fix priority → Stripe checkout
 import streamlit as st
 import requests
 import os
+import re
 from datetime import datetime
 
+from styles import load_css
+
 # Page configuration
 st.set_page_config(
     page_title="ViolationSentinel - HPD Risk Radar",
@@ -23,81 +26,28 @@ st.set_page_config(
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 STRIPE_CHECKOUT_URL = os.getenv("STRIPE_CHECKOUT_URL", "https://buy.stripe.com/test_placeholder")
 
+# Matches a 10-digit BBL (ASCII digits only) in a single scan
+BBL_MATCH = re.compile(r"\d{10}", re.ASCII).fullmatch
+
+
 # Custom CSS for styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1E3A8A;
-        font-weight: 800;
-        margin-bottom: 0.5rem;
-    }
-    .sub-header {
-        font-size: 1.25rem;
-        color: #4B5563;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 1rem;
-        color: white;
-        text-align: center;
-    }
-    .risk-critical {
-        background: linear-gradient(135deg, #DC2626 0%, #991B1B 100%) !important;
-    }
-    .risk-high {
-        background: linear-gradient(135deg, #EA580C 0%, #C2410C 100%) !important;
-    }
-    .risk-medium {
-        background: linear-gradient(135deg, #D97706 0%, #B45309 100%) !important;
-    }
-    .risk-low {
-        background: linear-gradient(135deg, #059669 0%, #047857 100%) !important;
-    }
-    .violation-item {
-        background: #FEF2F2;
-        border-left: 4px solid #DC2626;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        border-radius: 0.5rem;
-    }
-    .fix-priority {
-        background: #ECFDF5;
-        border-left: 4px solid #059669;
-        padding: 1rem;
-        margin: 1rem 0;
-        border-radius: 0.5rem;
-    }
-    .cta-button {
-        background: linear-gradient(135deg, #4F46E5 0%, #7C3AED 100%);
-        color: white;
-        padding: 1rem 2rem;
-        border-radius: 0.5rem;
-        text-decoration: none;
-        font-weight: bold;
-        display: inline-block;
-        margin-top: 1rem;
-    }
-    .free-tier-badge {
-        background: #DBEAFE;
-        color: #1E40AF;
-        padding: 0.25rem 0.75rem;
-        border-radius: 1rem;
-        font-size: 0.875rem;
-        font-weight: 600;
-    }
-    .pro-tier-badge {
-        background: #FEF3C7;
-        color: #92400E;
-        padding: 0.25rem 0.75rem;
-        border-radius: 1rem;
-        font-size: 0.875rem;
-        font-weight: 600;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{load_css('app.css')}</style>", unsafe_allow_html=True)
+
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _fetch_hpd_risk(bbl: str) -> dict:
+    """
+    Fetch HPD risk data for a building from the backend API.
+
+    Only successful responses are cached per BBL; failures raise, so
+    the next rerun tries the API again.
+    """
+    response = requests.get(f"{API_BASE_URL}/api/v1/risk/{bbl}", timeout=10)
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(
+            f"Risk API returned {response.status_code}", response=response
+        )
+    return response.json()
 
 
 def get_hpd_risk(bbl: str) -> dict:
@@ -107,9 +57,7 @@ def get_hpd_risk(bbl: str) -> dict:
     For MVP demo, returns realistic mock data based on BBL patterns.
     """
     try:
-        response = requests.get(f"{API_BASE_URL}/api/v1/risk/{bbl}", timeout=10)
-        if response.status_code == 200:
-            return response.json()
+        return _fetch_hpd_risk(bbl)
     except requests.exceptions.RequestException:
         pass  # Fall back to mock data for demo
     
@@ -222,7 +170,7 @@ bbl = st.text_input(
 if bbl:
     bbl = bbl.strip().replace("-", "").replace(" ", "")
     
-    if len(bbl) != 10 or not bbl.isdigit():
+    if not BBL_MATCH(bbl):
         st.error("⚠️ Please enter a valid 10-digit BBL number (Borough + Block + Lot)")
     else:
         # Create set of existing BBLs for O(1) lookup
@@ -7,11 +7,14 @@ Track all your buildings in one place with real-time risk scores.
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import os
 
+from styles import load_css
+
 # Page configuration
 st.set_page_config(
     page_title="Portfolio Dashboard - ViolationSentinel",
@@ -23,42 +26,21 @@ st.set_page_config(
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 STRIPE_CHECKOUT_URL = os.getenv("STRIPE_CHECKOUT_URL", "https://buy.stripe.com/test_placeholder")
 
+# Columns shown in the building details table
+BUILDING_TABLE_COLUMNS = [
+    "address", "bbl", "units", "year_built", "risk_level",
+    "risk_score", "exposure", "open_violations", "class_c",
+]
+
+# Chart colors, low to critical risk
+RISK_COLOR_SCALE = ["#10B981", "#D97706", "#EA580C", "#DC2626"]
+
+
 # Custom CSS
-st.markdown("""
-<style>
-    .portfolio-header {
-        font-size: 2rem;
-        color: #1E3A8A;
-        font-weight: 700;
-    }
-    .risk-badge {
-        display: inline-block;
-        padding: 0.25rem 0.75rem;
-        border-radius: 1rem;
-        font-weight: 600;
-        font-size: 0.875rem;
-    }
-    .risk-critical { background: #FEE2E2; color: #991B1B; }
-    .risk-high { background: #FFEDD5; color: #9A3412; }
-    .risk-medium { background: #FEF3C7; color: #92400E; }
-    .risk-low { background: #D1FAE5; color: #065F46; }
-    .building-card {
-        background: white;
-        border: 1px solid #E5E7EB;
-        border-radius: 0.75rem;
-        padding: 1rem;
-        margin-bottom: 1rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    }
-    .stat-highlight {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1rem;
-        border-radius: 0.75rem;
-        text-align: center;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{load_css('portfolio.css')}</style>", unsafe_allow_html=True)
+
+# One timestamp for the whole script run
+now = datetime.now()
 
 # Initialize session state from main app
 if "portfolio" not in st.session_state:
@@ -79,7 +61,7 @@ def get_risk_level(risk_score: float) -> tuple:
         return "LOW", "risk-low"
 
 
-def generate_mock_portfolio_data() -> list:
+def generate_mock_portfolio_data(now: datetime) -> list:
     """Generate realistic mock portfolio data for demonstration."""
     return [
         {
@@ -93,7 +75,7 @@ def generate_mock_portfolio_data() -> list:
             "class_c": 2,
             "class_b": 2,
             "class_a": 1,
-            "last_scan": datetime.now() - timedelta(hours=2),
+            "last_scan": now - timedelta(hours=2),
         },
         {
             "bbl": "3023450067",
@@ -106,7 +88,7 @@ def generate_mock_portfolio_data() -> list:
             "class_c": 1,
             "class_b": 1,
             "class_a": 1,
-            "last_scan": datetime.now() - timedelta(hours=4),
+            "last_scan": now - timedelta(hours=4),
         },
         {
             "bbl": "3034560078",
@@ -119,7 +101,7 @@ def generate_mock_portfolio_data() -> list:
             "class_c": 0,
             "class_b": 1,
             "class_a": 1,
-            "last_scan": datetime.now() - timedelta(hours=6),
+            "last_scan": now - timedelta(hours=6),
         },
         {
             "bbl": "3045670089",
@@ -132,11 +114,81 @@ def generate_mock_portfolio_data() -> list:
             "class_c": 0,
             "class_b": 0,
             "class_a": 1,
-            "last_scan": datetime.now() - timedelta(hours=8),
+            "last_scan": now - timedelta(hours=8),
         },
     ]
 
 
+@st.cache_data(show_spinner=False)
+def build_risk_charts(buildings: tuple) -> tuple:
+    """
+    Build the risk score bar chart and fine exposure pie chart.
+    
+    Takes (address, risk_score, exposure) tuples so the figures are
+    cached per portfolio rather than rebuilt on every rerun.
+    """
+    df = pd.DataFrame(buildings, columns=["address", "risk_score", "exposure"])
+    
+    # Risk score bar chart
+    fig = px.bar(
+        df,
+        x="address",
+        y="risk_score",
+        color="risk_score",
+        color_continuous_scale=RISK_COLOR_SCALE,
+        labels={"risk_score": "Risk Score", "address": "Building"},
+        title="Risk Score by Building"
+    )
+    fig.update_layout(showlegend=False, xaxis_tickangle=-45)
+    fig.add_hline(y=0.6, line_dash="dash", line_color="red", annotation_text="High Risk Threshold")
+    
+    # Exposure pie chart
+    fig2 = px.pie(
+        df,
+        values="exposure",
+        names="address",
+        title="Fine Exposure Distribution",
+        color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    return fig, fig2
+
+
+@st.cache_data(show_spinner=False)
+def build_trend_chart(end_date) -> go.Figure:
+    """Build the mock 30-day violation trend chart ending on end_date."""
+    # Generate mock trend data
+    dates = pd.date_range(end=end_date, periods=30, freq='D')
+    days = np.arange(30)
+    trend_data = pd.DataFrame({
+        'date': dates,
+        'total_violations': 13 + days % 5,
+        'class_c': 3 + days % 2,
+    })
+    
+    fig3 = go.Figure()
+    fig3.add_trace(go.Scatter(
+        x=trend_data['date'],
+        y=trend_data['total_violations'],
+        mode='lines+markers',
+        name='Total Violations',
+        line=dict(color='#3B82F6', width=2)
+    ))
+    fig3.add_trace(go.Scatter(
+        x=trend_data['date'],
+        y=trend_data['class_c'],
+        mode='lines+markers',
+        name='Class C (Critical)',
+        line=dict(color='#DC2626', width=2)
+    ))
+    fig3.update_layout(
+        title="Open Violations Over Time",
+        xaxis_title="Date",
+        yaxis_title="Count",
+        hovermode="x unified"
+    )
+    return fig3
+
+
 # Header
 st.markdown("<h1 class='portfolio-header'>📊 Portfolio Dashboard</h1>", unsafe_allow_html=True)
 st.markdown("Track all your buildings in one place with real-time risk monitoring.")
@@ -175,18 +227,22 @@ if st.session_state.user_tier == "free":
     st.info("👇 **Preview**: Here's what your portfolio dashboard could look like:")
 
 # Get portfolio data (use mock data for demo)
-portfolio_data = generate_mock_portfolio_data()
+portfolio_data = generate_mock_portfolio_data(now)
 
 if not portfolio_data:
     st.info("No buildings in your portfolio yet. Add buildings from the main dashboard.")
 else:
+    # One DataFrame feeds the metrics, charts, building list and era split
+    df = pd.DataFrame(portfolio_data)
+    
     # Portfolio Summary Metrics
-    total_buildings = len(portfolio_data)
-    total_units = sum(p["units"] for p in portfolio_data)
-    total_exposure = sum(p["exposure"] for p in portfolio_data)
-    total_violations = sum(p["open_violations"] for p in portfolio_data)
-    total_class_c = sum(p["class_c"] for p in portfolio_data)
-    avg_risk = sum(p["risk_score"] for p in portfolio_data) / total_buildings
+    total_buildings = len(df)
+    totals = df[["units", "exposure", "open_violations", "class_c"]].sum()
+    total_units = int(totals["units"])
+    total_exposure = int(totals["exposure"])
+    total_violations = int(totals["open_violations"])
+    total_class_c = int(totals["class_c"])
+    avg_risk = df["risk_score"].mean()
     
     # Summary Cards
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -215,58 +271,37 @@ else:
     with chart_col:
         st.subheader("📈 Risk Distribution")
         
-        # Create DataFrame for visualization
-        df = pd.DataFrame(portfolio_data)
-        
-        # Risk score bar chart
-        fig = px.bar(
-            df,
-            x="address",
-            y="risk_score",
-            color="risk_score",
-            color_continuous_scale=["#10B981", "#D97706", "#EA580C", "#DC2626"],
-            labels={"risk_score": "Risk Score", "address": "Building"},
-            title="Risk Score by Building"
+        fig, fig2 = build_risk_charts(
+            tuple(df[["address", "risk_score", "exposure"]].itertuples(index=False, name=None))
         )
-        fig.update_layout(showlegend=False, xaxis_tickangle=-45)
-        fig.add_hline(y=0.6, line_dash="dash", line_color="red", annotation_text="High Risk Threshold")
         st.plotly_chart(fig, use_container_width=True)
-        
-        # Exposure pie chart
-        fig2 = px.pie(
-            df,
-            values="exposure",
-            names="address",
-            title="Fine Exposure Distribution",
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
         st.plotly_chart(fig2, use_container_width=True)
     
     with table_col:
         st.subheader("🏢 Building Details")
         
-        # Building cards
-        for building in sorted(portfolio_data, key=lambda x: x["risk_score"], reverse=True):
-            risk_level, risk_class = get_risk_level(building["risk_score"])
-            
-            with st.container():
-                st.markdown(f"""
-                <div class="building-card">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <div>
-                            <strong>{building['address']}</strong><br>
-                            <small>BBL: {building['bbl']} • {building['units']} units • Built {building['year_built']}</small>
-                        </div>
-                        <span class="risk-badge {risk_class}">{risk_level}</span>
-                    </div>
-                    <hr style="margin: 0.5rem 0;">
-                    <div style="display: flex; justify-content: space-between;">
-                        <span>💰 ${building['exposure']:,}</span>
-                        <span>⚠️ {building['open_violations']} violations</span>
-                        <span>🔴 {building['class_c']} Class C</span>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        # One table for all buildings, highest risk first
+        buildings_df = df.sort_values("risk_score", ascending=False)
+        st.dataframe(
+            buildings_df.assign(
+                risk_level=buildings_df["risk_score"].map(lambda score: get_risk_level(score)[0])
+            )[BUILDING_TABLE_COLUMNS],
+            column_config={
+                "address": "Building",
+                "bbl": "BBL",
+                "units": "Units",
+                "year_built": st.column_config.NumberColumn("Built", format="%d"),
+                "risk_level": "Risk",
+                "risk_score": st.column_config.ProgressColumn(
+                    "Risk Score", min_value=0, max_value=1, format="%.2f"
+                ),
+                "exposure": st.column_config.NumberColumn("Exposure", format="$%d"),
+                "open_violations": "Violations",
+                "class_c": "Class C",
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
         
         # Actions
         st.subheader("🎯 Quick Actions")
@@ -285,42 +320,15 @@ else:
     # Violation Trend (mock data)
     st.subheader("📉 Violation Trend (Last 30 Days)")
     
-    # Generate mock trend data
-    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
-    trend_data = pd.DataFrame({
-        'date': dates,
-        'total_violations': [15 + i % 5 - 2 for i in range(30)],
-        'class_c': [3 + i % 2 for i in range(30)],
-    })
-    
-    fig3 = go.Figure()
-    fig3.add_trace(go.Scatter(
-        x=trend_data['date'],
-        y=trend_data['total_violations'],
-        mode='lines+markers',
-        name='Total Violations',
-        line=dict(color='#3B82F6', width=2)
-    ))
-    fig3.add_trace(go.Scatter(
-        x=trend_data['date'],
-        y=trend_data['class_c'],
-        mode='lines+markers',
-        name='Class C (Critical)',
-        line=dict(color='#DC2626', width=2)
-    ))
-    fig3.update_layout(
-        title="Open Violations Over Time",
-        xaxis_title="Date",
-        yaxis_title="Count",
-        hovermode="x unified"
-    )
+    fig3 = build_trend_chart(now.date())
     st.plotly_chart(fig3, use_container_width=True)
     
     # Pre-1974 Building Analysis
     st.subheader("🏗️ Pre-1974 Risk Analysis")
     
-    pre1974_buildings = [b for b in portfolio_data if b["year_built"] < 1974]
-    post1974_buildings = [b for b in portfolio_data if b["year_built"] >= 1974]
+    pre1974_mask = df["year_built"] < 1974
+    pre1974_buildings = df[pre1974_mask]
+    post1974_buildings = df[~pre1974_mask]
     
     col1, col2 = st.columns(2)
     
@@ -331,8 +339,8 @@ else:
             len(pre1974_buildings),
             delta=f"{pre1974_pct:.0f}% of portfolio"
         )
-        if pre1974_buildings:
-            avg_pre1974_risk = sum(b["risk_score"] for b in pre1974_buildings) / len(pre1974_buildings)
+        if not pre1974_buildings.empty:
+            avg_pre1974_risk = pre1974_buildings["risk_score"].mean()
             st.warning(f"⚠️ Avg Risk Score: {avg_pre1974_risk:.0%} (2.5x baseline risk)")
     
     with col2:
@@ -342,8 +350,8 @@ else:
             len(post1974_buildings),
             delta=f"{post1974_pct:.0f}% of portfolio"
         )
-        if post1974_buildings:
-            avg_post1974_risk = sum(b["risk_score"] for b in post1974_buildings) / len(post1974_buildings)
+        if not post1974_buildings.empty:
+            avg_post1974_risk = post1974_buildings["risk_score"].mean()
             st.success(f"✅ Avg Risk Score: {avg_post1974_risk:.0%} (baseline risk)")
 
 # Sidebar
@@ -354,16 +362,16 @@ with st.sidebar:
     
     st.subheader("Quick Stats")
     if portfolio_data:
-        highest_risk = max(portfolio_data, key=lambda x: x["risk_score"])
+        highest_risk = df.loc[df["risk_score"].idxmax()]
         st.error(f"🔴 Highest Risk:\n{highest_risk['address']}\n({highest_risk['risk_score']:.0%})")
         
-        most_exposure = max(portfolio_data, key=lambda x: x["exposure"])
+        most_exposure = df.loc[df["exposure"].idxmax()]
         st.warning(f"💰 Most Exposure:\n{most_exposure['address']}\n(${most_exposure['exposure']:,})")
     
     st.divider()
     
     st.subheader("Heat Season Alert")
-    current_month = datetime.now().month
+    current_month = now.month
     if current_month >= 10 or current_month <= 5:
         st.error("🌡️ **ACTIVE**\nOct 1 - May 31\nClass C heat violations at peak")
     else:
@@ -9,6 +9,8 @@ import streamlit as st
 import os
 from datetime import datetime
 
+from styles import load_css
+
 # Page configuration
 st.set_page_config(
     page_title="Alerts Setup - ViolationSentinel",
@@ -27,45 +29,7 @@ def is_heat_season() -> bool:
 
 
 # Custom CSS
-st.markdown("""
-<style>
-    .alerts-header {
-        font-size: 2rem;
-        color: #1E3A8A;
-        font-weight: 700;
-    }
-    .alert-card {
-        background: white;
-        border: 1px solid #E5E7EB;
-        border-radius: 0.75rem;
-        padding: 1.5rem;
-        margin-bottom: 1rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    }
-    .alert-type-critical {
-        border-left: 4px solid #DC2626;
-    }
-    .alert-type-high {
-        border-left: 4px solid #EA580C;
-    }
-    .alert-type-info {
-        border-left: 4px solid #3B82F6;
-    }
-    .phone-input {
-        font-size: 1.25rem;
-        padding: 0.75rem;
-    }
-    .toggle-container {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        padding: 1rem;
-        background: #F9FAFB;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{load_css('alerts.css')}</style>", unsafe_allow_html=True)
 
 # Initialize session state
 if "user_tier" not in st.session_state:
@@ -0,0 +1,18 @@
+"""
+ViolationSentinel - Shared page styles
+
+Stylesheets for the dashboard pages live in streamlit/static.
+"""
+
+import os
+
+import streamlit as st
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@st.cache_resource
+def load_css(name: str) -> str:
+    """Read a stylesheet from the static directory once per server process."""
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+        return f.read()
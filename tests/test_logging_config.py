@@ -0,0 +1,55 @@
+"""
+Unit tests for request context handling in the logging configuration.
+"""
+
+import asyncio
+
+import pytest
+
+from infrastructure.logging_config import (
+    request_id_var,
+    reset_request_context,
+    set_request_context,
+    user_id_var,
+)
+
+
+class TestRequestContext:
+    """Test setting and restoring request context."""
+
+    def test_reset_restores_context_in_sync_code(self):
+        """Resetting in sync code should not leak into the next request."""
+        tokens = set_request_context(request_id='req1', user_id='user1')
+        assert request_id_var.get() == 'req1'
+        assert user_id_var.get() == 'user1'
+
+        reset_request_context(tokens)
+
+        assert request_id_var.get() is None
+        assert user_id_var.get() is None
+
+    def test_nested_reset_restores_outer_request(self):
+        """Resetting an inner context should restore the outer one."""
+        outer = set_request_context(request_id='outer')
+        inner = set_request_context(request_id='inner')
+
+        reset_request_context(inner)
+        assert request_id_var.get() == 'outer'
+
+        reset_request_context(outer)
+        assert request_id_var.get() is None
+
+    def test_context_visible_in_worker_thread(self):
+        """Context set in a coroutine should reach asyncio.to_thread workers."""
+        async def handler():
+            tokens = set_request_context(request_id='abc')
+            try:
+                return await asyncio.to_thread(request_id_var.get)
+            finally:
+                reset_request_context(tokens)
+
+        assert asyncio.run(handler()) == 'abc'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -12,14 +12,16 @@ try:
         pre1974_risk_multiplier,
         get_building_era_risk,
         is_pre1974_building,
-        calculate_portfolio_pre1974_stats
+        calculate_portfolio_pre1974_stats,
+        pre1974_risk_multiplier_array
     )
 except ImportError:
     from risk_engine.pre1974_multiplier import (
         pre1974_risk_multiplier,
         get_building_era_risk,
         is_pre1974_building,
-        calculate_portfolio_pre1974_stats
+        calculate_portfolio_pre1974_stats,
+        pre1974_risk_multiplier_array
     )
 
 
@@ -70,6 +72,15 @@ class TestPre1974RiskMultiplier:
         
         result = pre1974_risk_multiplier({})  # Missing
         assert result[0] == 1.0
+    
+    def test_array_matches_scalar(self):
+        """Vectorized multipliers should match the scalar function."""
+        years = [0, 1500, 1800, 1920, 1959, 1960, 1973, 1974, 2000, 2025, 2026, 3000]
+        
+        result = pre1974_risk_multiplier_array(years)
+        
+        expected = [pre1974_risk_multiplier({'year_built': year})[0] for year in years]
+        assert result.tolist() == expected
 
 
 class TestBuildingEraRisk:
@@ -110,6 +121,19 @@ class TestBuildingEraRisk:
         result = get_building_era_risk(None)
         assert result['multiplier'] == 1.0
         assert result['era'] == 'Unknown'
+    
+    def test_era_details_are_fresh_lists(self):
+        """Test that returned lists can be modified without affecting later calls."""
+        result = get_building_era_risk(1950)
+        assert isinstance(result['risk_factors'], list)
+        assert isinstance(result['action_items'], list)
+        
+        result['risk_factors'].append('Custom factor')
+        result['action_items'].clear()
+        
+        fresh = get_building_era_risk(1950)
+        assert 'Custom factor' not in fresh['risk_factors']
+        assert len(fresh['action_items']) > 0
 
 
 class TestPre1974Check:
@@ -216,6 +240,21 @@ class TestPortfolioStats:
         assert stats['pre1974_count'] == 1  # Only 1965
         # Average includes defaults to 1.0x for invalid years
         assert stats['average_multiplier'] > 1.0
+    
+    def test_portfolio_with_nan_years(self):
+        """Test portfolio records built from pandas, where missing years are NaN."""
+        buildings = [
+            {'year_built': float('nan')},
+            {'year_built': 1950.0},
+            {'year_built': 1990.0},
+        ]
+        
+        stats = calculate_portfolio_pre1974_stats(buildings)
+        
+        assert stats['total_buildings'] == 3
+        assert stats['pre1974_count'] == 1
+        assert stats['pre1960_count'] == 1
+        assert stats['average_multiplier'] == round((3.8 + 1.0 + 1.0) / 3, 2)
 
 
 if __name__ == '__main__':
@@ -4,6 +4,9 @@ Integration tests for the complete risk engine.
 Tests all competitive moat features working together.
 """
 
+import io
+
+import numpy as np
 import pytest
 from datetime import datetime
 
@@ -12,16 +15,19 @@ try:
     from src.violationsentinel.scoring import (
         pre1974_risk_multiplier,
         inspector_risk_multiplier,
+        get_district_hotspot,
         get_borough_from_bbl,
         heat_violation_forecast,
         is_heat_season,
         peer_percentile,
+        score_portfolio_vectorized,
     )
 except ImportError:
     from risk_engine.pre1974_multiplier import pre1974_risk_multiplier
-    from risk_engine.inspector_patterns import inspector_risk_multiplier, get_borough_from_bbl
+    from risk_engine.inspector_patterns import inspector_risk_multiplier, get_district_hotspot, get_borough_from_bbl
     from risk_engine.seasonal_heat_model import heat_violation_forecast, is_heat_season
     from risk_engine.peer_benchmark import peer_percentile
+    from risk_engine.portfolio_scoring import score_portfolio_vectorized
 
 
 class TestInspectorPatterns:
@@ -63,6 +69,16 @@ class TestInspectorPatterns:
         """Test invalid BBL handling."""
         multiplier = inspector_risk_multiplier('invalid')
         assert multiplier == 1.0  # Default
+    
+    def test_district_hotspot_actions_are_fresh_lists(self):
+        """Test that hotspot action items can be modified without affecting the cache."""
+        hotspot = get_district_hotspot('brooklyn_council_36')
+        assert isinstance(hotspot['action_items'], list)
+        
+        hotspot['action_items'].append('Custom action')
+        
+        fresh = get_district_hotspot('brooklyn_council_36')
+        assert 'Custom action' not in fresh['action_items']
 
 
 class TestSeasonalHeatModel:
@@ -161,6 +177,45 @@ class TestPeerBenchmarking:
         
         assert result['vs_peers'] == 'Insufficient peer data'
         assert result['percentile'] is None
+    
+    def test_same_cohort_reuses_peer_sample(self):
+        """Buildings in the same cohort are compared against one cached peer sample."""
+        first = peer_percentile(
+            address="1 Cohort St",
+            risk_score=60.0,
+            building_data={'borough': 'Queens', 'units': 41, 'year_built': 1931}
+        )
+        second = peer_percentile(
+            address="2 Cohort St",
+            risk_score=60.0,
+            building_data={'borough': 'queens', 'units': 48, 'year_built': 1938}
+        )
+        
+        assert second['similar_count'] == first['similar_count']
+        assert second['neighborhood_avg'] == first['neighborhood_avg']
+        assert second['neighborhood_median'] == first['neighborhood_median']
+        assert second['percentile'] == first['percentile']
+    
+    def test_malformed_building_data(self):
+        """Non-numeric units/years and non-string boroughs do not raise."""
+        result = peer_percentile(
+            address="Test St",
+            risk_score=50.0,
+            building_data={'borough': 3, 'units': 'N/A', 'year_built': 'unknown'}
+        )
+        
+        assert result['percentile'] is not None
+        assert result['similar_count'] > 0
+    
+    def test_numpy_building_data(self):
+        """Units and years read from a DataFrame are numpy scalars."""
+        result = peer_percentile(
+            address="Test St",
+            risk_score=50.0,
+            building_data={'borough': 'Brooklyn', 'units': np.int64(50), 'year_built': np.int32(1950)}
+        )
+        
+        assert result['match_criteria'] == "Matched on: Brooklyn properties, 35-65 units, built 1935 to 1965"
 
 
 class TestIntegratedRiskScoring:
@@ -213,6 +268,40 @@ class TestIntegratedRiskScoring:
         # Combined risk should be low
         combined_risk = era_mult * inspector_mult * heat_forecast['risk_multiplier']
         assert combined_risk < 2.0
+    
+    def test_vectorized_portfolio_matches_per_building(self):
+        """Bulk portfolio scoring should match the per-building multipliers."""
+        buildings = [
+            {'bbl': '3012650001', 'council_district': 'brooklyn_council_36', 'year_built': 1950},
+            {'bbl': '2012650001', 'council_district': 'Bronx_Council_15', 'year_built': 1965},
+            {'bbl': '5012650001', 'year_built': 2010},
+            {'bbl': '1012650001', 'council_district': 'unknown_district', 'year_built': None},
+            {'bbl': '12345', 'year_built': 1500},
+        ]
+        
+        result = score_portfolio_vectorized(buildings)
+        
+        expected = [
+            inspector_risk_multiplier(b['bbl'], b.get('council_district'))
+            * pre1974_risk_multiplier(b)[0]
+            for b in buildings
+        ]
+        assert result.tolist() == pytest.approx(expected)
+    
+    def test_vectorized_portfolio_dataframe_without_districts(self):
+        """A DataFrame with an all-missing district column falls back to borough baselines."""
+        pd = pytest.importorskip("pandas")
+        # An empty column in a CSV extract is read as float64 NaN
+        buildings = pd.read_csv(io.StringIO(
+            "bbl,council_district,year_built\n"
+            "3012650001,,1950\n"
+            "2012650001,,\n"
+        ), dtype={'bbl': str})
+        assert buildings['council_district'].dtype == 'float64'
+        
+        result = score_portfolio_vectorized(buildings)
+        
+        assert result.tolist() == pytest.approx([1.2 * 3.8, 1.4])
 
 
 class TestRiskEngineEdgeCases:
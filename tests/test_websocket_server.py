@@ -0,0 +1,411 @@
+"""
+Unit tests for the monitoring WebSocket server's subscription handling.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("websockets")
+jwt = pytest.importorskip("jwt")
+
+from monitoring import websocket_server
+from monitoring.websocket_server import (
+    MSGPACK_AVAILABLE,
+    Connection,
+    RateLimiter,
+    SubscriptionTrie,
+    WebSocketServer,
+    decode_message,
+    encode_message,
+)
+
+requires_msgpack = pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+
+JWT_SECRET = "test-secret-key-for-websocket-tests"
+
+
+class RecordingWebSocket:
+    """Stand-in for a client socket that records the frames sent to it."""
+
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame):
+        self.frames.append(frame)
+
+    @property
+    def sent(self):
+        """Decoded frames; binary frames are MessagePack."""
+        return [
+            decode_message(frame, 'msgpack' if isinstance(frame, bytes) else 'json')
+            for frame in self.frames
+        ]
+
+
+class FailingLink:
+    """Relay peer whose sends fail."""
+
+    async def send(self, frame):
+        raise ConnectionError("peer went away")
+
+
+class StalledLink:
+    """Relay peer that never accepts a frame."""
+
+    async def send(self, frame):
+        await asyncio.sleep(3600)
+
+
+class RecordingCounter:
+    """Stand-in for a metric child that records increments."""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+async def _connect(server, connection_id=1, role=None, encoding=None):
+    """Register a connection with the server and authenticate it."""
+    websocket = RecordingWebSocket()
+    conn = Connection(websocket, connection_id)
+    server.connections[connection_id] = conn
+
+    claims = {'user_id': f'user{connection_id}'}
+    if role:
+        claims['role'] = role
+    message = {'type': 'AUTHENTICATE', 'token': jwt.encode(claims, JWT_SECRET, algorithm='HS256')}
+    if encoding:
+        message['encoding'] = encoding
+    await server._handle_message(conn, json.dumps(message))
+    return conn, websocket
+
+
+def _subscribe(property_id, role=None):
+    """Authenticate a connection with the given role, then subscribe it."""
+    async def run():
+        server = WebSocketServer(jwt_secret=JWT_SECRET)
+        conn, websocket = await _connect(server, role=role)
+        await server._handle_message(conn, json.dumps({'type': 'SUBSCRIBE', 'property_id': property_id}))
+        return server, conn, websocket.sent[-1]
+
+    return asyncio.run(run())
+
+
+class TestRateLimiter:
+    """Test the per-connection token bucket."""
+
+    def test_burst_up_to_capacity(self):
+        """A full bucket admits max_messages at once, then refuses."""
+        limiter = RateLimiter(max_messages=5, window_seconds=60)
+        now = limiter.last_refill
+
+        assert all(limiter.check_rate_limit(now) for _ in range(5))
+        assert not limiter.check_rate_limit(now)
+
+    def test_refill_over_time(self):
+        """Tokens come back continuously at max_messages per window."""
+        limiter = RateLimiter(max_messages=6, window_seconds=60)
+        now = limiter.last_refill
+        for _ in range(6):
+            limiter.check_rate_limit(now)
+
+        assert not limiter.check_rate_limit(now + 5)  # Half a token
+        assert limiter.check_rate_limit(now + 10)
+        assert not limiter.check_rate_limit(now + 10)
+
+    def test_refill_capped_at_capacity(self):
+        """A long idle period does not bank more than one burst."""
+        limiter = RateLimiter(max_messages=3, window_seconds=60)
+        now = limiter.last_refill + 3600
+
+        assert all(limiter.check_rate_limit(now) for _ in range(3))
+        assert not limiter.check_rate_limit(now)
+
+    def test_now_defaults_to_monotonic_clock(self):
+        """Without a reading from the caller, the limiter reads the clock itself."""
+        limiter = RateLimiter(max_messages=1, window_seconds=60)
+
+        assert limiter.check_rate_limit()
+        assert not limiter.check_rate_limit()
+        assert limiter.last_refill <= time.monotonic()
+
+
+class TestSubscriptionTrie:
+    """Test the property id prefix tree."""
+
+    def test_add_and_match(self):
+        """Exact and prefix keys both match a property id."""
+        trie = SubscriptionTrie()
+        assert trie.add('1012650001', 1)
+        assert trie.add('101265*', 2)
+        assert not trie.add('1012650001', 1)
+
+        assert trie.match('1012650001') == {1, 2}
+        assert trie.match('1012650002') == {2}
+        assert trie.match('3012340056') == frozenset()
+        assert len(trie) == 2
+        assert trie.subscription_count == 2
+
+    def test_discard_prunes_empty_branches(self):
+        """Removing the last subscriber removes the nodes that led to it."""
+        trie = SubscriptionTrie()
+        trie.add('1012650001', 1)
+        trie.add('1012650002', 1)
+
+        assert trie.discard('1012650001', 1)
+        assert not trie.discard('1012650001', 1)
+        assert '1' in trie.root.children
+
+        assert trie.discard('1012650002', 1)
+        assert trie.root.children == {}
+        assert not trie
+        assert trie.subscription_count == 0
+
+    def test_match_is_a_snapshot(self):
+        """A matched set is not changed by later (un)subscribes."""
+        trie = SubscriptionTrie()
+        trie.add('1012650001', 1)
+        matched = trie.match('1012650001')
+
+        trie.add('1012650001', 2)
+        trie.discard('1012650001', 1)
+
+        assert matched == {1}
+        assert trie.match('1012650001') == {2}
+
+
+class TestEncoding:
+    """Test frame encoding and decoding."""
+
+    def test_json_round_trip(self):
+        """JSON frames are text and decode back to the message."""
+        message = {'type': 'UPDATE', 'property_id': '1012650001', 'count': 3}
+        frame = encode_message(message)
+
+        assert isinstance(frame, str)
+        assert decode_message(frame) == message
+
+    @requires_msgpack
+    def test_msgpack_round_trip(self):
+        """MessagePack frames are binary and decode back to the message."""
+        message = {'type': 'UPDATE', 'property_id': '1012650001', 'score': 0.75, 'tags': ['heat']}
+        frame = encode_message(message, 'msgpack')
+
+        assert isinstance(frame, bytes)
+        assert decode_message(frame, 'msgpack') == message
+
+    @requires_msgpack
+    def test_msgpack_connection_accepts_json_text(self):
+        """Text frames from a MessagePack connection are still parsed as JSON."""
+        assert decode_message('{"type": "PING"}', 'msgpack') == {'type': 'PING'}
+
+
+class TestAuthentication:
+    """Test JWT validation and role checks."""
+
+    def test_cached_token_rejected_after_expiry(self, monkeypatch):
+        """A token cached while valid is refused once its exp has passed."""
+        server = WebSocketServer(jwt_secret=JWT_SECRET)
+        exp = int(time.time()) + 60
+        token = jwt.encode({'user_id': 'user1', 'exp': exp}, JWT_SECRET, algorithm='HS256')
+
+        assert server._validate_jwt(token)['user_id'] == 'user1'
+        assert token in server._jwt_cache
+
+        monkeypatch.setattr(time, 'time', lambda: exp + 1)
+        assert server._validate_jwt(token) is None
+        assert token not in server._jwt_cache
+
+    def test_relay_rejected_without_relay_role(self):
+        """Only relay peers may inject broadcasts."""
+        async def run():
+            server = WebSocketServer(jwt_secret=JWT_SECRET)
+            subscriber, subscriber_socket = await _connect(server, connection_id=1)
+            await server._handle_message(subscriber, json.dumps({'type': 'SUBSCRIBE', 'property_id': '1012650001'}))
+
+            sender, sender_socket = await _connect(server, connection_id=2)
+            await server._handle_message(sender, json.dumps({
+                'type': 'RELAY',
+                'property_id': '1012650001',
+                'message': {'type': 'UPDATE'},
+            }))
+            return sender_socket.sent[-1], subscriber_socket.sent
+
+        reply, subscriber_frames = asyncio.run(run())
+
+        assert reply == {'type': 'ERROR', 'message': 'Relay authentication required'}
+        assert {'type': 'UPDATE'} not in subscriber_frames
+
+
+class TestRelay:
+    """Test forwarding broadcasts to relay peers."""
+
+    def test_only_successful_sends_are_counted(self, monkeypatch):
+        """Failed and timed-out peer sends are not counted as relayed."""
+        counter = RecordingCounter()
+        monkeypatch.setitem(websocket_server.OUTBOUND_MESSAGES, 'RELAY', counter)
+        monkeypatch.setattr(WebSocketServer, 'RELAY_SEND_TIMEOUT', 0.01)
+
+        server = WebSocketServer(jwt_secret=JWT_SECRET)
+        delivered = RecordingWebSocket()
+        server._relay_links = {
+            'ws://a': delivered,
+            'ws://b': FailingLink(),
+            'ws://c': StalledLink(),
+        }
+        asyncio.run(server._relay('1012650001', {'type': 'UPDATE'}))
+
+        assert counter.value == 1
+        assert delivered.sent == [{'type': 'RELAY', 'property_id': '1012650001', 'message': {'type': 'UPDATE'}}]
+
+
+class TestWildcardSubscriptions:
+    """Test authorization of wildcard (prefix) subscriptions."""
+
+    def test_wildcard_rejected_without_role(self):
+        """Regular clients cannot subscribe to a prefix."""
+        server, conn, reply = _subscribe('101265*')
+
+        assert reply == {'type': 'ERROR', 'message': 'Wildcard subscriptions not permitted'}
+        assert not conn.subscriptions
+        assert not server.subscriptions.match('1012650001')
+
+    def test_short_wildcard_rejected_for_admin(self):
+        """Borough-wide prefixes are rejected even for admins."""
+        server, conn, reply = _subscribe('1*', role='admin')
+
+        assert reply == {'type': 'ERROR', 'message': 'Wildcard prefix too short'}
+        assert not server.subscriptions.match('1012650001')
+
+    def test_block_wildcard_allowed_for_admin(self):
+        """Admins can follow a single block."""
+        server, conn, reply = _subscribe('101265*', role='admin')
+
+        assert reply == {'type': 'SUBSCRIBED', 'property_id': '101265*'}
+        assert server.subscriptions.match('1012650001') == {conn.connection_id}
+
+    def test_exact_subscription_needs_no_role(self):
+        """Exact property subscriptions are unaffected."""
+        server, conn, reply = _subscribe('1012650001')
+
+        assert reply == {'type': 'SUBSCRIBED', 'property_id': '1012650001'}
+
+
+class TestMessageHandling:
+    """Test validation and rate limiting of inbound messages."""
+
+    def _exchange(self, *messages):
+        """Send messages on one authenticated connection and return the replies."""
+        async def run():
+            server = WebSocketServer(jwt_secret=JWT_SECRET)
+            conn, websocket = await _connect(server)
+            for message in messages:
+                await server._handle_message(conn, json.dumps(message))
+            return conn, websocket.sent[1:]
+
+        return asyncio.run(run())
+
+    def test_property_ids_ignored_outside_batch(self):
+        """Only SUBSCRIBE_BATCH reads property_ids, so other types ignore it."""
+        _, replies = self._exchange({'type': 'GET_STATUS', 'property_ids': 5})
+
+        assert replies[0]['type'] == 'STATUS'
+
+    def test_batch_larger_than_bucket_does_not_lock_out(self):
+        """A batch costs one token, so the connection keeps working after it."""
+        property_ids = [f'1012650{i:03d}' for i in range(150)]
+        conn, replies = self._exchange(
+            {'type': 'SUBSCRIBE_BATCH', 'property_ids': property_ids},
+            {'type': 'PING'},
+        )
+
+        assert replies == [
+            {'type': 'SUBSCRIBED', 'property_ids': property_ids},
+            {'type': 'PONG'},
+        ]
+        assert len(conn.subscriptions) == 150
+
+
+class TestBroadcast:
+    """Test delivery of broadcasts to subscribers."""
+
+    def test_unserializable_payload_does_not_escape(self):
+        """A payload the encoder rejects is skipped, not raised to the caller."""
+        async def run():
+            server = WebSocketServer(jwt_secret=JWT_SECRET)
+            conn, websocket = await _connect(server)
+            await server._handle_message(conn, json.dumps({'type': 'SUBSCRIBE', 'property_id': '1012650001'}))
+
+            await server.broadcast('1012650001', {'type': 'UPDATE', 'tags': {'heat', 'hot_water'}})
+            await server.broadcast('1012650001', {'type': 'UPDATE', 'violations': 2})
+            return websocket.sent[2:]
+
+        assert asyncio.run(run()) == [{'type': 'UPDATE', 'violations': 2}]
+
+    def _batched_broadcast(self, encoding=None):
+        """Broadcast twice to a batch-mode connection and return its frames."""
+        async def run():
+            server = WebSocketServer(jwt_secret=JWT_SECRET)
+            conn, websocket = await _connect(server, encoding=encoding)
+            await server._handle_message(conn, json.dumps({
+                'type': 'SUBSCRIBE', 'property_id': '1012650001', 'batch': True,
+            }))
+
+            await server.broadcast('1012650001', {'type': 'UPDATE', 'seq': 1})
+            await server.broadcast('1012650001', {'type': 'UPDATE', 'seq': 2})
+            await asyncio.sleep(Connection.BATCH_WINDOW * 4)
+            return websocket.frames[2:]
+
+        return asyncio.run(run())
+
+    def test_batch_mode_json_array_frame(self):
+        """Broadcasts within the batch window arrive as one JSON array."""
+        frames = self._batched_broadcast()
+
+        assert len(frames) == 1
+        assert isinstance(frames[0], str)
+        assert decode_message(frames[0]) == [{'type': 'UPDATE', 'seq': 1}, {'type': 'UPDATE', 'seq': 2}]
+
+    @requires_msgpack
+    def test_batch_mode_msgpack_array_frame(self):
+        """MessagePack connections get one binary array frame."""
+        frames = self._batched_broadcast(encoding='msgpack')
+
+        assert len(frames) == 1
+        assert isinstance(frames[0], bytes)
+        assert decode_message(frames[0], 'msgpack') == [{'type': 'UPDATE', 'seq': 1}, {'type': 'UPDATE', 'seq': 2}]
+
+    @requires_msgpack
+    def test_encoding_switch_flushes_pending_batch(self):
+        """Frames buffered before a switch to MessagePack are sent as JSON first."""
+        async def run():
+            server = WebSocketServer(jwt_secret=JWT_SECRET)
+            conn, websocket = await _connect(server)
+            await server._handle_message(conn, json.dumps({
+                'type': 'SUBSCRIBE', 'property_id': '1012650001', 'batch': True,
+            }))
+            await server.broadcast('1012650001', {'type': 'UPDATE', 'seq': 1})
+
+            token = jwt.encode({'user_id': 'user1'}, JWT_SECRET, algorithm='HS256')
+            await server._handle_message(conn, json.dumps({
+                'type': 'AUTHENTICATE', 'token': token, 'encoding': 'msgpack',
+            }))
+            await server.broadcast('1012650001', {'type': 'UPDATE', 'seq': 2})
+            await asyncio.sleep(Connection.BATCH_WINDOW * 4)
+            return websocket.frames[2:]
+
+        frames = asyncio.run(run())
+
+        assert [type(frame) for frame in frames] == [str, bytes, bytes]
+        assert decode_message(frames[0]) == [{'type': 'UPDATE', 'seq': 1}]
+        assert decode_message(frames[1], 'msgpack')['type'] == 'AUTHENTICATED'
+        assert decode_message(frames[2], 'msgpack') == [{'type': 'UPDATE', 'seq': 2}]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])